@@ -7,7 +7,7 @@ Upgraded to match the sophistication of the Web and OSINT agents.
 
 Architecture:
 - Deep Dueling DQN (8192 -> 4096 -> 2048 -> 1024 neurons)
-- GPU Accelerated (TF32, CuDNN Benchmark)
+- GPU Accelerated (TF32, CuDNN Benchmark, FP16 Autocast)
 - Double DQN with Soft Updates
 - Massive Batch Size (4096) for RTX 2070
 """
@@ -19,6 +19,8 @@ import numpy as np
 import random
 from typing import Tuple
 import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 class ExperienceMemory:
     """
@@ -31,13 +33,43 @@ class ExperienceMemory:
         self.current_size = 0
         
         # Pre-allocate memory blocks for maximum speed
-        self.states = np.zeros((capacity, state_size), dtype=np.float32)
-        self.actions = np.zeros((capacity, 1), dtype=np.int64)
-        self.rewards = np.zeros((capacity, 1), dtype=np.float32)
-        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
-        self.dones = np.zeros((capacity, 1), dtype=np.float32)
+        # States are small bounded values, so FP16 halves RAM and H2D traffic
+        self.states = np.zeros((capacity, state_size), dtype=np.float16)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float16)
+        self.dones = np.zeros(capacity, dtype=np.float32)
         
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        
+        # Reusable host staging buffers (pinned on CUDA for async H2D copies).
+        # Allocated lazily on the first recall_batch, sized to the batch.
+        self.pin_memory = self.device.type == 'cuda'
+        self._staging = None
+        self._copy_done = None
+        
+        # Index sampling without per-batch allocations. Seeded from the global
+        # NumPy RNG so np.random.seed() still makes replay reproducible.
+        self._rng = np.random.default_rng(np.random.randint(2**31))
+        self._rand_buf = None
+        self._idx_buf = None
+        
+        # Side stream so the next batch can be copied while the current one trains
+        self.memcpy_stream = torch.cuda.Stream(self.device) if self.pin_memory else None
+        self._staged = None
+
+    def _allocate_staging(self, batch_size: int):
+        """Allocates the index and host buffers that recall_batch gathers into."""
+        sources = (self.states, self.actions, self.rewards, self.next_states, self.dones)
+        self._staging = tuple(
+            torch.empty((batch_size,) + source.shape[1:], dtype=torch.from_numpy(source[:0]).dtype,
+                        pin_memory=self.pin_memory)
+            for source in sources
+        )
+        self._rand_buf = np.empty(batch_size, dtype=np.float64)
+        self._idx_buf = np.empty(batch_size, dtype=np.int64)
+        if self.pin_memory:
+            self._copy_done = torch.cuda.Event()
 
     def save(self, state: np.ndarray, action: int, reward: float, next_state: np.ndarray, done: bool):
         """Saves a single experience to memory."""
@@ -53,15 +85,60 @@ class ExperienceMemory:
 
     def recall_batch(self, batch_size: int) -> Tuple[torch.Tensor, ...]:
         """Randomly recalls a batch of past experiences for training."""
-        indices = np.random.randint(0, self.current_size, size=batch_size)
-        
-        return (
-            torch.FloatTensor(self.states[indices]).to(self.device),
-            torch.LongTensor(self.actions[indices]).to(self.device),
-            torch.FloatTensor(self.rewards[indices]).to(self.device),
-            torch.FloatTensor(self.next_states[indices]).to(self.device),
-            torch.FloatTensor(self.dones[indices]).to(self.device)
-        )
+        if self._staged is not None and self._staged[0].shape[0] == batch_size:
+            # Use the batch issued by prefetch_batch once its copies have landed
+            compute_stream = torch.cuda.current_stream(self.device)
+            compute_stream.wait_stream(self.memcpy_stream)
+            batch, self._staged = self._staged, None
+            for tensor in batch:
+                tensor.record_stream(compute_stream)
+            return batch
+        
+        return self._gather_batch(batch_size)
+
+    def prefetch_batch(self, batch_size: int):
+        """
+        Starts copying the next batch to the GPU on a side stream.
+        The following recall_batch picks it up, so transitions saved in between
+        are only eligible from the batch after that. No-op on CPU.
+        """
+        if self.memcpy_stream is None:
+            return
+        
+        with torch.cuda.stream(self.memcpy_stream):
+            self._staged = self._gather_batch(batch_size)
+
+    def _gather_batch(self, batch_size: int) -> Tuple[torch.Tensor, ...]:
+        """
+        Samples indices and moves the selected experiences to the device.
+        On CPU the returned action/reward/done tensors share the staging
+        buffers, so they are only valid until the next call.
+        """
+        if self._staging is None or self._staging[0].shape[0] != batch_size:
+            self._allocate_staging(batch_size)
+        elif self.pin_memory:
+            # The previous batch may still be in flight from these buffers
+            self._copy_done.synchronize()
+        
+        # Uniform indices in [0, current_size), truncated in place
+        self._rng.random(out=self._rand_buf)
+        np.multiply(self._rand_buf, self.current_size, out=self._rand_buf)
+        indices = self._idx_buf
+        indices[:] = self._rand_buf
+        
+        sources = (self.states, self.actions, self.rewards, self.next_states, self.dones)
+        for source, buffer in zip(sources, self._staging):
+            np.take(source, indices, axis=0, out=buffer.numpy())
+        
+        batch = [buffer.to(self.device, non_blocking=True) for buffer in self._staging]
+        if self.pin_memory:
+            self._copy_done.record()
+        
+        # Widen the FP16 states back to FP32 on the device
+        batch[0] = batch[0].float()
+        batch[3] = batch[3].float()
+        
+        return tuple(batch)
 
     def __len__(self) -> int:
         return self.current_size
@@ -116,6 +193,17 @@ class RedTeamBrain(nn.Module):
         return q_values
 
 
+def _cpu_snapshot(obj):
+    """Deep-copies a (nested) state dict with every tensor cloned to host memory."""
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: _cpu_snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_cpu_snapshot(v) for v in obj)
+    return obj
+
+
 class RedTeamAgent:
     """
     Advanced Red Team Agent Controller.
@@ -144,6 +232,7 @@ class RedTeamAgent:
             torch.backends.cuda.matmul.allow_tf32 = True  # Enable TF32 for speed
             print(f"   ⚡ CuDNN Benchmark: ENABLED")
             print(f"   ⚡ TF32 Math: ENABLED (MAX Speed Mode)")
+            print(f"   ⚡ FP16 Autocast: ENABLED (Tensor Cores)")
             print(f"   📦 Batch Size: 4096 (MAX)")
             print(f"   🧠 Network Size: 8192 neurons (MAX)")
         
@@ -158,9 +247,37 @@ class RedTeamAgent:
         self.target_brain.load_state_dict(self.brain.state_dict())
         self.target_brain.eval()  # Never train this directly!
         
+        # Compiled forwards for replay (fuses the dueling aggregation into the
+        # last GEMM epilogues). Needs CUDA + Triton; otherwise run eagerly.
+        # The modules stay uncompiled so checkpoint keys are unchanged.
+        self.brain_forward = self.brain
+        self.target_forward = self.target_brain
+        if self.device.type == 'cuda' and importlib.util.find_spec("triton") is not None:
+            self.brain_forward = torch.compile(self.brain)
+            self.target_forward = torch.compile(self.target_brain)
+            print(f"   ⚡ torch.compile: ENABLED")
+        
+        # Reused single-state input for act(): pinned host row + device copy
+        self._act_host = torch.empty((1, state_dim), dtype=torch.float32,
+                                     pin_memory=self.device.type == 'cuda')
+        self._act_host_row = self._act_host.numpy()[0]
+        self._act_input = self._act_host.to(self.device) if self.device.type == 'cuda' else self._act_host
+        
+        # Cached parameter lists for the fused soft update
+        self._brain_params = list(self.brain.parameters())
+        self._target_params = list(self.target_brain.parameters())
+        
         # Optimizer
         self.optimizer = optim.Adam(self.brain.parameters(), lr=self.learning_rate)
         self.loss_function = nn.MSELoss()
+        
+        # Mixed precision: FP16 GEMMs on tensor cores, loss scaling for stable grads
+        self.use_amp = self.device.type == 'cuda'
+        self.scaler = torch.amp.GradScaler('cuda', enabled=self.use_amp)
+        
+        # Background checkpoint writer for save_async (single worker keeps saves in order)
+        self._save_pool = None
+        self._pending_save = None
 
     def act(self, state: np.ndarray, training: bool = True) -> int:
         """
@@ -172,12 +289,32 @@ class RedTeamAgent:
             return random.randrange(self.action_dim)
         
         # Exploitation
-        state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            q_values = self.brain(state_tensor)
+        np.copyto(self._act_host_row, state)
+        if self._act_input is not self._act_host:
+            self._act_input.copy_(self._act_host, non_blocking=True)
+        with torch.inference_mode(), torch.autocast(self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            q_values = self.brain(self._act_input)
         
+        # .item() syncs, so the host buffer is free again for the next call
         return int(q_values.argmax().item())
 
+    def act_batch(self, states: np.ndarray, training: bool = True) -> np.ndarray:
+        """
+        Decides actions for a batch of states (e.g. parallel environments).
+        One forward pass for all N states instead of N single-state passes.
+        """
+        states_tensor = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device, non_blocking=True)
+        with torch.inference_mode(), torch.autocast(self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            q_values = self.brain(states_tensor)
+        actions = q_values.argmax(1).cpu().numpy()
+        
+        # Exploration, decided independently for each state
+        if training:
+            explore = np.random.rand(len(actions)) <= self.epsilon
+            actions[explore] = np.random.randint(self.action_dim, size=int(explore.sum()))
+        
+        return actions
+
     def remember(self, state: np.ndarray, action: int, reward: float, next_state: np.ndarray, done: bool):
         """Stores a new experience in memory."""
         self.memory.save(state, action, reward, next_state, done)
@@ -194,27 +331,35 @@ class RedTeamAgent:
         # 1. Recall a batch of memories
         states, actions, rewards, next_states, dones = self.memory.recall_batch(self.batch_size)
         
-        # 2. Predict what we THOUGHT would happen (Current Q)
-        current_q_values = self.brain(states).gather(1, actions).squeeze(1)
-        
-        # 3. Calculate what ACTUALLY happened (Target Q) using Double DQN
-        # Step A: Main Brain picks the best action for the next state
-        best_actions = self.brain(next_states).argmax(1).unsqueeze(1)
-        
-        # Step B: Target Brain calculates the value of that action
-        # This prevents the agent from being "overconfident"
-        next_q_values = self.target_brain(next_states).gather(1, best_actions).squeeze(1)
-        
-        # Step C: Bellman Equation
-        target_q_values = rewards.squeeze(1) + (1 - dones.squeeze(1)) * self.gamma * next_q_values
-        
-        # 4. Calculate the mistake (Loss)
-        loss = self.loss_function(current_q_values, target_q_values.detach())
+        with torch.autocast(self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            # 2. Predict what we THOUGHT would happen (Current Q)
+            current_q_values = self.brain_forward(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+            
+            # 3. Calculate what ACTUALLY happened (Target Q) using Double DQN
+            # The target is a fixed label, so no autograd graph is recorded.
+            # (no_grad, not inference_mode: the loss saves it for backward)
+            with torch.no_grad():
+                # Step A: Main Brain picks the best action for the next state
+                # (eval mode: no dropout noise in the selection, no dropout kernels)
+                self.brain.eval()
+                best_actions = self.brain_forward(next_states).argmax(1, keepdim=True)
+                self.brain.train()
+                
+                # Step B: Target Brain calculates the value of that action
+                # This prevents the agent from being "overconfident"
+                next_q_values = self.target_forward(next_states).gather(1, best_actions).squeeze(1)
+                
+                # Step C: Bellman Equation
+                target_q_values = rewards + (1 - dones) * self.gamma * next_q_values
+            
+            # 4. Calculate the mistake (Loss)
+            loss = self.loss_function(current_q_values, target_q_values)
         
-        # 5. Correct the Brain (Backpropagation)
+        # 5. Correct the Brain (Backpropagation, with FP16 loss scaling)
         self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        self.scaler.scale(loss).backward()
+        self.scaler.step(self.optimizer)
+        self.scaler.update()
         
         # 6. Soft Update: Slowly blend Main Brain into Target Brain
         self.soft_update()
@@ -222,6 +367,9 @@ class RedTeamAgent:
         # 7. Reduce curiosity slightly (become more confident)
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
+        
+        # 8. Start moving the next batch to the GPU while this step finishes
+        self.memory.prefetch_batch(self.batch_size)
 
     def soft_update(self):
         """
@@ -229,21 +377,56 @@ class RedTeamAgent:
         This creates a "Moving Target" that is stable but eventually catches up.
         Formula: Target = (tau * Main) + ((1-tau) * Target)
         """
-        for target_param, local_param in zip(self.target_brain.parameters(), self.brain.parameters()):
-            target_param.data.copy_(self.tau * local_param.data + (1.0 - self.tau) * target_param.data)
+        with torch.no_grad():
+            torch._foreach_mul_(self._target_params, 1.0 - self.tau)
+            torch._foreach_add_(self._target_params, self._brain_params, alpha=self.tau)
 
-    def save(self, filepath: str):
-        """Saves the brain to disk."""
-        torch.save({
+    def _checkpoint(self) -> dict:
+        """Collects everything save() writes (live references, not copies)."""
+        return {
             'brain_state': self.brain.state_dict(),
             'target_brain_state': self.target_brain.state_dict(),
             'optimizer_state': self.optimizer.state_dict(),
+            'scaler_state': self.scaler.state_dict(),
             'epsilon': self.epsilon
-        }, filepath)
+        }
+
+    def save(self, filepath: str):
+        """Saves the brain to disk."""
+        self.wait_for_saves()
+        torch.save(self._checkpoint(), filepath)
         print(f"💾 Red Team Brain saved to {filepath}")
 
+    def save_async(self, filepath: str):
+        """
+        Saves the brain to disk on a background thread.
+        Only the host-memory snapshot happens here, so training continues while torch.save writes.
+        """
+        snapshot = _cpu_snapshot(self._checkpoint())
+        if self._save_pool is None:
+            self._save_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending_save = self._save_pool.submit(self._write_checkpoint, snapshot, filepath)
+
+    @staticmethod
+    def _write_checkpoint(snapshot: dict, filepath: str):
+        # Write beside the target and rename, so a reader never sees a half-written file
+        tmp_path = f"{filepath}.tmp"
+        try:
+            torch.save(snapshot, tmp_path)
+            os.replace(tmp_path, filepath)
+            print(f"💾 Red Team Brain saved to {filepath}")
+        except Exception as e:
+            print(f"⚠️ Failed to save {filepath}: {e}")
+
+    def wait_for_saves(self):
+        """Blocks until every save_async call has finished writing."""
+        if self._pending_save is not None:
+            self._pending_save.result()
+            self._pending_save = None
+
     def load(self, filepath: str) -> bool:
         """Loads the brain from disk."""
+        self.wait_for_saves()
         if not os.path.exists(filepath):
             print(f"⚠️ Model not found: {filepath}")
             return False
@@ -252,6 +435,8 @@ class RedTeamAgent:
         self.brain.load_state_dict(checkpoint['brain_state'])
         self.target_brain.load_state_dict(checkpoint['target_brain_state'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state'])
+        if checkpoint.get('scaler_state'):  # Absent in older / CPU-saved checkpoints
+            self.scaler.load_state_dict(checkpoint['scaler_state'])
         self.epsilon = checkpoint['epsilon']
         print(f"✅ Red Team Brain loaded from {filepath}")
         return True
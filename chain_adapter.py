@@ -6,6 +6,8 @@ It accepts a target from the Upstream Agent (OSINT) and returns results.
 
 Usage:
     python chain_adapter.py --input '{"target_ip": "10.10.10.5", "os_type": "Linux", "scope": "strict"}'
+    python chain_adapter.py --input '{"targets": [{"target_ip": "10.10.10.5"}, {"target_ip": "10.10.10.6", "os_type": "Windows"}]}'
+    python chain_adapter.py --serve   (one JSON request per stdin line, one JSON result per stdout line)
 
 Output (JSON):
     {
@@ -14,86 +16,164 @@ Output (JSON):
         "findings": ["Weak SSH", "Dirty Cow"],
         "next_stage_recommendation": "Post-Exploitation"
     }
+
+With "targets", all hosts are attacked in parallel envs sharing one batched
+policy forward per step, and a JSON list with one result per target is returned.
 """
 import sys
 import json
 import argparse
+import contextlib
 import torch
 import numpy as np
 from sb3_contrib import RecurrentPPO
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 from env.advanced_env import AdvancedKillChainEnv
 
-def run_chain_step(input_data):
-    target_ip = input_data.get("target_ip", "127.0.0.1")
-    os_type = input_data.get("os_type", "Linux")
+MODEL_PATH = "redteam_lstm_final.zip"
+
+# Loaded policies, keyed on model path, so repeated calls skip the reload
+_model_cache = {}
+
+def load_model(model_path=MODEL_PATH):
+    """Loads the RecurrentPPO policy, reusing it if this process already has it."""
+    model = _model_cache.get(model_path)
+    if model is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        model = RecurrentPPO.load(model_path, device=device)
+        _model_cache[model_path] = model
+    return model
+
+def make_env():
+    return AdvancedKillChainEnv()
+
+# Env access_level codes -> reported access level
+ACCESS_LEVELS = ["none", "user", "root"]
+
+def _record_step(episode, reward, info):
+    """Accumulates reward, findings and access level for one target."""
+    episode["total_reward"] += reward
+    
+    # Capture Findings (the env flags successful actions and reports access directly)
+    if info.get("success"):
+        episode["findings"].append(info["output"])
+    episode["max_access"] = max(episode["max_access"], info.get("access_gained", 0))
+
+def _invalid_targets(targets):
+    """Returns why targets can't be run (None if it is a non-empty list of target objects)."""
+    if not isinstance(targets, list) or not targets:
+        return "\"targets\" must be a non-empty list"
+    if not all(isinstance(target, dict) for target in targets):
+        return "Each target must be a JSON object"
+    return None
+
+def run_chain_batch(targets, model_path=MODEL_PATH):
+    """Runs one episode per target in parallel envs and returns a result per target (one error result if targets is invalid)."""
+    error = _invalid_targets(targets)
+    if error:
+        return {"status": "error", "message": error}
     
-    print(f"🔗 CHAIN LINK ACTIVE: Target {target_ip} ({os_type})")
+    for target in targets:
+        print(f"🔗 CHAIN LINK ACTIVE: Target {target.get('target_ip', '127.0.0.1')} ({target.get('os_type', 'Linux')})")
     
     # Load Model
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model_path = "redteam_lstm_final.zip"
-    
     try:
-        model = RecurrentPPO.load(model_path, device=device)
+        model = load_model(model_path)
     except Exception as e:
-        return {
+        return [{
             "status": "error",
             "message": f"Failed to load model: {str(e)}"
-        }
+        } for _ in targets]
     
-    # Init Env with specific target
-    env = AdvancedKillChainEnv()
-    obs, _ = env.reset(options={"os_type": os_type, "target_ip": target_ip})
+    # Init one Env per target (separate processes when there is more than one)
+    num_envs = len(targets)
+    vec_env_cls = SubprocVecEnv if num_envs > 1 else DummyVecEnv
+    env = vec_env_cls([make_env] * num_envs)
+    env.set_options([{
+        "os_type": target.get("os_type", "Linux"),
+        "target_ip": target.get("target_ip", "127.0.0.1")
+    } for target in targets])
+    obs = env.reset()
     
-    # Run Episode
-    done = False
+    # Run Episodes
     lstm_states = None
-    episode_starts = np.ones((1,), dtype=bool)
+    episode_starts = np.ones((num_envs,), dtype=bool)
+    active = np.ones((num_envs,), dtype=bool)
+    episodes = [{"findings": [], "max_access": 0, "total_reward": 0.0} for _ in targets]
     
-    findings = []
-    max_access = "none"
-    total_reward = 0
-    
-    while not done:
-        action, lstm_states = model.predict(obs, state=lstm_states, episode_start=episode_starts, deterministic=True)
-        obs, reward, terminated, truncated, info = env.step(action)
-        done = terminated or truncated
-        episode_starts = np.array([done])
-        
-        total_reward += reward
-        
-        # Capture Findings
-        output = info.get('output', '')
-        if "SUCCESS" in output or "found" in output.lower():
-            findings.append(output)
-            
-        if "root" in output.lower() or "admin" in output.lower():
-            max_access = "root"
-        elif "user" in output.lower() and max_access == "none":
-            max_access = "user"
+    try:
+        while active.any():
+            actions, lstm_states = model.predict(obs, state=lstm_states, episode_start=episode_starts, deterministic=True)
+            obs, rewards, dones, infos = env.step(actions)
+            episode_starts = dones
             
+            # Finished envs auto-reset; only their first episode is reported
+            for i in np.flatnonzero(active):
+                _record_step(episodes[i], rewards[i], infos[i])
+            active &= ~dones
+    finally:
+        env.close()
+    
     # Result Construction
-    result = {
+    return [{
         "agent": "RedTeam_Linux_Agent",
-        "target_ip": target_ip,
+        "target_ip": target.get("target_ip", "127.0.0.1"),
         "status": "completed",
-        "total_reward": float(total_reward),
-        "max_access_level": max_access,
-        "findings": list(set(findings)), # Unique findings
-        "success": bool(total_reward > 0)
-    }
+        "total_reward": float(episode["total_reward"]),
+        "max_access_level": ACCESS_LEVELS[episode["max_access"]],
+        "findings": list(set(episode["findings"])), # Unique findings
+        "success": bool(episode["total_reward"] > 0)
+    } for target, episode in zip(targets, episodes)]
+
+def run_chain_step(input_data):
+    results = run_chain_batch([input_data])
+    return results if isinstance(results, dict) else results[0]
+
+def run_chain_input(input_data):
+    """Dispatches a single-target or multi-target ("targets") request."""
+    if not isinstance(input_data, dict):
+        return {"status": "error", "message": "Input must be a JSON object"}
+    if "targets" in input_data:
+        return run_chain_batch(input_data["targets"])
+    return run_chain_step(input_data)
+
+def serve(model_path=MODEL_PATH):
+    """Worker mode: load the model once, then answer JSON requests from stdin line by line."""
+    # Progress prints go to stderr so stdout stays one JSON result per line
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            load_model(model_path)
+        except Exception as e:
+            print(f"⚠️ Model not loaded yet: {e}")
     
-    return result
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+            with contextlib.redirect_stdout(sys.stderr):
+                result = run_chain_input(data)
+        except json.JSONDecodeError:
+            result = {"status": "error", "message": "Invalid JSON input"}
+        except Exception as e:
+            # One bad request must not take down the worker
+            result = {"status": "error", "message": str(e)}
+        print(json.dumps(result))
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", type=str, help="JSON input string")
+    parser.add_argument("--serve", action="store_true", help="Keep the model loaded and read JSON requests from stdin")
     args = parser.parse_args()
     
-    if args.input:
+    if args.serve:
+        serve()
+    elif args.input:
         try:
             data = json.loads(args.input)
-            result = run_chain_step(data)
+            result = run_chain_input(data)
             print(json.dumps(result, indent=2))
         except json.JSONDecodeError:
             print(json.dumps({"status": "error", "message": "Invalid JSON input"}))
@@ -80,6 +80,20 @@ class AdvancedKillChainEnv(gym.Env):
         
         self.action_space = spaces.Discrete(len(self.actions))
         
+        # --- ACTION LOOKUP TABLES (indexed by action_id) ---
+        # Kill chain group: 0:Recon 1:Initial Access 2:Execution 3:Persistence
+        #                   4:PrivEsc 5:Lateral Movement 6:Exfil & Impact
+        self.action_phase = np.repeat(np.arange(7, dtype=np.int8), 5)
+        # Which target OS (by index into os_types) each action can run on
+        self.action_os_allowed = np.ones((len(self.actions), len(self.os_types)), dtype=bool)
+        self.action_os_allowed[10, [0, 2]] = False # PowerShell: Windows only
+        self.action_os_allowed[11, 1] = False      # eBPF: not on Windows
+        # Tool name used in the "not available" message
+        self.action_tool = [name.split("_", 1)[0] for name in self.actions]
+        # Noisy actions that burn stealth on success
+        self.action_noisy = np.zeros(len(self.actions), dtype=bool)
+        self.action_noisy[3] = True # Botnet_Distributed_Scan
+        
         # --- OBSERVATION SPACE ---
         # We use a Dict space for structured "Human-like" understanding
         self.observation_space = spaces.Dict({
@@ -94,11 +108,31 @@ class AdvancedKillChainEnv(gym.Env):
         
         # Internal State
         self.state = {}
+        # Curiosity visit counts (kept for the env's lifetime, across episodes)
+        self.state_visits = {}
+        # Bit weights for packing the vulns_known bitmask into the visit key
+        self._vuln_bits = 1 << np.arange(5, dtype=np.int64)
+        # Reused observation dict; _get_obs refreshes it in place every step
+        self._obs = self._new_obs()
         self.max_steps = 100
         self.current_step = 0
 
+    def _new_obs(self):
+        return {
+            "os_type": 0,
+            "kill_chain_phase": 0,
+            "stealth_meter": np.zeros(1, dtype=np.float32),
+            "access_level": 0,
+            "vulns_known": np.zeros(5, dtype=np.int8),
+            "business_value_found": np.zeros(1, dtype=np.float32),
+            "lateral_nodes_found": 0
+        }
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
+        # Fresh dict per episode: VecEnv auto-reset keeps the previous one
+        # as info["terminal_observation"], so it must not be overwritten
+        self._obs = self._new_obs()
         
         # Default to random if no options provided
         if options and 'os_type' in options:
@@ -129,15 +163,16 @@ class AdvancedKillChainEnv(gym.Env):
         return self._get_obs(), {}
 
     def _get_obs(self):
-        return {
-            "os_type": self.state["os_type"],
-            "kill_chain_phase": self.state["kill_chain_phase"],
-            "stealth_meter": np.array([self.state["stealth_meter"]], dtype=np.float32),
-            "access_level": self.state["access_level"],
-            "vulns_known": self.state["vulns_known"],
-            "business_value_found": np.array([self.state["business_value_found"]], dtype=np.float32),
-            "lateral_nodes_found": self.state["lateral_nodes_found"]
-        }
+        # The same dict (and arrays) is returned every call; VecEnv wrappers copy it
+        obs = self._obs
+        obs["os_type"] = self.state["os_type"]
+        obs["kill_chain_phase"] = self.state["kill_chain_phase"]
+        obs["stealth_meter"][0] = self.state["stealth_meter"]
+        obs["access_level"] = self.state["access_level"]
+        obs["vulns_known"] = self.state["vulns_known"]
+        obs["business_value_found"][0] = self.state["business_value_found"]
+        obs["lateral_nodes_found"] = self.state["lateral_nodes_found"]
+        return obs
 
     def step(self, action_id):
         self.current_step += 1
@@ -147,66 +182,65 @@ class AdvancedKillChainEnv(gym.Env):
         reward = -0.1 
         done = False
         truncated = False
-        info = {"action": action_name, "os": self.current_os}
+        # success: the action achieved something; access_gained: access level after it
+        info = {"action": action_name, "os": self.current_os, "success": False}
         
         # --- CURIOSITY (Intrinsic Motivation) ---
         # Simple Count-Based Exploration
-        # We hash the state to track visits
-        state_hash = hash((
-            self.state["os_type"],
-            self.state["kill_chain_phase"],
-            self.state["access_level"],
-            tuple(self.state["vulns_known"]),
-            self.state["stealth_meter"] // 10, # Discretize stealth for hashing
-            self.state["lateral_nodes_found"]
-        ))
+        # We pack the discrete state into a single int key to track visits
+        # Bits: os 0-1 | phase 2-4 | access 5-6 | stealth/10 7-10 | nodes 11-13 | vulns 14-18
+        state_key = (
+            self.state["os_type"]
+            | (self.state["kill_chain_phase"] << 2)
+            | (self.state["access_level"] << 5)
+            | (max(int(self.state["stealth_meter"] // 10), 0) << 7) # Discretize stealth
+            | (self.state["lateral_nodes_found"] << 11)
+            | (int(self.state["vulns_known"] @ self._vuln_bits) << 14)
+        )
         
-        if not hasattr(self, "state_visits"):
-            self.state_visits = {}
-            
-        visit_count = self.state_visits.get(state_hash, 0) + 1
-        self.state_visits[state_hash] = visit_count
+        visit_count = self.state_visits.get(state_key, 0) + 1
+        self.state_visits[state_key] = visit_count
         
         # Intrinsic Reward: Higher for novel states
-        intrinsic_reward = 1.0 / np.sqrt(visit_count)
+        intrinsic_reward = visit_count ** -0.5
         reward += intrinsic_reward
 
         # --- LOGIC ENGINE ---
         
         # 1. OS Mismatch Check
-        if "PowerShell" in action_name and self.current_os != "Windows":
+        if not self.action_os_allowed[action_id, self.current_os_idx]:
             reward -= 5.0 # Fail command
-            info["output"] = "FAIL: PowerShell not available on " + self.current_os
-            return self._get_obs(), reward, done, truncated, info
-            
-        if "eBPF" in action_name and self.current_os == "Windows":
-            reward -= 5.0 # Fail command
-            info["output"] = "FAIL: eBPF not available on " + self.current_os
+            info["output"] = f"FAIL: {self.action_tool[action_id]} not available on {self.current_os}"
+            info["access_gained"] = self.state["access_level"]
             return self._get_obs(), reward, done, truncated, info
 
         # 2. Kill Chain Progression Logic
+        phase = self.action_phase[action_id]
         
         # RECON
-        if action_id <= 4:
+        if phase == 0:
             if self.state["kill_chain_phase"] == 0:
                 self.state["kill_chain_phase"] = 1 # Advance
                 reward += 1.0 # Small progress reward
-                if "Botnet" in action_name:
+                if self.action_noisy[action_id]:
                     self.state["stealth_meter"] -= 20
                     info["output"] = "Recon successful but noisy (Botnet)."
+                    info["success"] = True
                 else:
                     info["output"] = "Stealth recon successful."
+                    info["success"] = True
             else:
                 info["output"] = "Recon already done."
 
         # INITIAL ACCESS
-        elif 5 <= action_id <= 9:
+        elif phase == 1:
             if self.state["kill_chain_phase"] >= 1 and self.state["access_level"] == 0:
                 if random.random() > 0.4:
                     self.state["access_level"] = 1
                     self.state["kill_chain_phase"] = 2
                     reward += 10.0 # Gain Shell
                     info["output"] = "Initial Access Gained! (+10)"
+                    info["success"] = True
                 else:
                     self.state["stealth_meter"] -= 10
                     info["output"] = "Exploit failed."
@@ -215,12 +249,13 @@ class AdvancedKillChainEnv(gym.Env):
                 info["output"] = "Cannot exploit without recon or already have access."
 
         # EXECUTION & PERSISTENCE
-        elif 10 <= action_id <= 19:
+        elif phase == 2 or phase == 3:
             if self.state["access_level"] >= 1:
                 # Actions 15-19 are Persistence
-                if action_id >= 15:
+                if phase == 3:
                      reward += 5.0
                      info["output"] = "Persistence established."
+                     info["success"] = True
                 else:
                      info["output"] = "Command executed."
             else:
@@ -228,12 +263,13 @@ class AdvancedKillChainEnv(gym.Env):
                 info["output"] = "No access to execute commands."
 
         # PRIVILEGE ESCALATION
-        elif 20 <= action_id <= 24:
+        elif phase == 4:
             if self.state["access_level"] == 1:
                 if random.random() > 0.5:
                     self.state["access_level"] = 2 # Admin/Root
                     reward += 50.0 # Escalate to Root
                     info["output"] = "Privilege Escalation Successful! (ROOT/ADMIN) (+50)"
+                    info["success"] = True
                 else:
                     self.state["stealth_meter"] -= 15
                     info["output"] = "PrivEsc failed."
@@ -241,56 +277,62 @@ class AdvancedKillChainEnv(gym.Env):
                 info["output"] = "Need user access first."
 
         # LATERAL MOVEMENT (New Phase)
-        elif 25 <= action_id <= 29:
+        elif phase == 5:
             if self.state["access_level"] >= 1: # Need at least user access
-                if "Subnet_Scan" in action_name:
+                if action_id == 25: # Internal_Subnet_Scan
                     if self.state["lateral_nodes_found"] == 0:
                         self.state["lateral_nodes_found"] = random.randint(1, 3)
                         reward += 20.0
                         info["output"] = f"Network Scan: Found {self.state['lateral_nodes_found']} internal hosts."
+                        info["success"] = True
                     else:
                         info["output"] = "Network already scanned."
                 
-                elif "Pass_The_Hash" in action_name or "Key_Hijacking" in action_name:
+                elif action_id == 26 or action_id == 27: # Pass_The_Hash / Key_Hijacking
                     if self.state["lateral_nodes_found"] > 0:
                         if random.random() > 0.5:
                             reward += 40.0
                             info["output"] = "Lateral Movement Successful! Compromised internal node."
+                            info["success"] = True
                         else:
                             self.state["stealth_meter"] -= 10
                             info["output"] = "Lateral move failed."
                     else:
                         info["output"] = "No internal nodes found to pivot to."
                 
-                elif "Tunneling" in action_name:
+                elif action_id == 29: # Tunneling_ProxyChains
                     reward += 10.0
                     info["output"] = "ProxyChain established."
+                    info["success"] = True
             else:
                 reward -= 5.0
                 info["output"] = "Need access to pivot."
 
         # EXFILTRATION & IMPACT
-        elif 30 <= action_id <= 34:
+        elif phase == 6:
             if self.state["access_level"] >= 1:
-                if "Vector_Embeddings" in action_name:
+                if action_id == 30: # Exfil_Vector_Embeddings_DB
                     if self.state["access_level"] == 2:
                         reward += 100.0 # Find Flag / High Value
                         self.state["business_value_found"] += 100
                         info["output"] = "CRITICAL: Vector Embeddings DB Exfiltrated! (+100)"
+                        info["success"] = True
                         done = True # Mission Complete
                     else:
                         reward -= 5.0
                         info["output"] = "Need Root/Admin to access Database."
                 
-                elif "Voice_Prints" in action_name:
+                elif action_id == 31: # Exfil_Executive_Voice_Prints
                     reward += 30.0
                     self.state["business_value_found"] += 30
                     info["output"] = "Executive Voice Prints exfiltrated."
+                    info["success"] = True
                     
-                elif "Ransomware" in action_name:
+                elif action_id == 32: # Quantum_Ransomware_Crypt
                     reward += 50.0
                     self.state["stealth_meter"] = 0 # Very Noisy
                     info["output"] = "Quantum Ransomware deployed."
+                    info["success"] = True
                     done = True
             else:
                 info["output"] = "No access to exfiltrate."
@@ -300,11 +342,13 @@ class AdvancedKillChainEnv(gym.Env):
             reward -= 20.0 # Trigger detection
             done = True
             info["output"] = "DETECTED! Mission Failed. (-20)"
+            info["success"] = False
 
         # Truncate
         if self.current_step >= self.max_steps:
             reward -= 5.0 # Timeout
             truncated = True
-            
+        
+        info["access_gained"] = self.state["access_level"]
         return self._get_obs(), reward, done, truncated, info
 
@@ -2,9 +2,158 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import random
 from typing import Tuple, Dict, List
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Optional: step_batch falls back to NumPy table lookups
+    NUMBA_AVAILABLE = False
+
+# Step outputs, indexed by the outcome code the step logic produces
+_OUTPUTS = (
+    "No output.",                                       # 0
+    "PORT 22/tcp OPEN (SSH)\nPORT 80/tcp OPEN (HTTP)",  # 1: nmap
+    "Ports already scanned.",                           # 2
+    "[SUCCESS] Password found: 'password123'",          # 3: hydra
+    "[FAIL] Brute force detected!",                     # 4
+    "Cannot brute force yet.",                          # 5
+    "Connection received from 10.10.10.5!",             # 6: reverse shell
+    "Failed to trigger shell.",                         # 7
+    "User may run /usr/bin/vim as root NOPASSWD",       # 8: sudo -l
+    "Permission denied.",                               # 9
+    "# whoami\nroot",                                   # 10: dirty cow
+    "Exploit failed.",                                  # 11
+    "CTF{L1nux_R00t_M4st3r}",                           # 12: read flag
+    "cat: /root/flag.txt: Permission denied",           # 13
+)
+
+def _step_findings(action, output):
+    """Report findings a step's (action, output) pair evidences; published as info["findings"]."""
+    found = set()
+    if "SUCCESS" in output:
+        found.add("weak_credentials")
+    if "Connection received" in output:
+        found.add("rce")
+    if "root" in output and "whoami" in action:
+        found.add("privesc")
+    return frozenset(found)
+
+# State columns (also the observation order)
+_ACCESS, _PORTS, _VULN, _SHELL, _ALERT = range(5)
+
+# --- RULE BOOK ---
+# One row per action that does something; every other action only costs time.
+#   requires:  {column: (lo, hi)} ranges the pre-step state must be in
+#   roll:      succeeds only if the step's uniform is above this (None = always)
+#   on_ok:     (column, value) written on success; on_fail: written on a failed roll
+#   outcomes:  _OUTPUTS codes for (success, failed roll, requirements not met)
+_RULES = (
+    # action  requires                            reward  roll  on_ok         on_fail      win    outcomes
+    (0,  {_PORTS: (0, 0)},                        10.0,  None, (_PORTS, 1),  None,        False, (1, 0, 2)),   # nmap
+    (5,  {_PORTS: (1, 1), _ACCESS: (0, 0)},       50.0,  0.6,  (_ACCESS, 1), (_ALERT, 1), False, (3, 4, 5)),   # Hydra (40% success rate)
+    (8,  {_ACCESS: (1, 2), _SHELL: (0, 0)},       30.0,  None, (_SHELL, 1),  None,        False, (6, 0, 7)),   # Reverse Shell
+    (10, {_ACCESS: (1, 1)},                       20.0,  None, (_VULN, 1),   None,        False, (8, 0, 9)),   # sudo -l
+    (14, {_VULN: (1, 1), _ACCESS: (1, 1)},        100.0, None, (_ACCESS, 2), None,        False, (10, 0, 11)), # Dirty Cow -> ROOT!
+    (12, {_ACCESS: (2, 2)},                       500.0, None, None,         None,        True,  (12, 0, 13)), # Read Flag (WIN CONDITION)
+)
+
+def _build_rule_tables(num_actions=20, num_cols=5):
+    """Flattens _RULES into per-action lookup arrays (indexed by action_id)."""
+    t = {
+        "lo": np.zeros((num_actions, num_cols), dtype=np.int8),
+        "hi": np.full((num_actions, num_cols), np.iinfo(np.int8).max, dtype=np.int8),
+        "reward": np.zeros(num_actions, dtype=np.float32),
+        "roll": np.full(num_actions, -1.0),  # -1: any uniform in [0, 1) passes
+        "ok_col": np.full(num_actions, -1, dtype=np.int64),  # -1: nothing to write
+        "ok_val": np.zeros(num_actions, dtype=np.int8),
+        "fail_col": np.full(num_actions, -1, dtype=np.int64),
+        "fail_val": np.zeros(num_actions, dtype=np.int8),
+        "win": np.zeros(num_actions, dtype=bool),
+        "out_ok": np.zeros(num_actions, dtype=np.int8),
+        "out_fail": np.zeros(num_actions, dtype=np.int8),
+        "out_blocked": np.zeros(num_actions, dtype=np.int8),
+    }
+    for action, requires, reward, roll, on_ok, on_fail, win, outcomes in _RULES:
+        for col, (lo, hi) in requires.items():
+            t["lo"][action, col] = lo
+            t["hi"][action, col] = hi
+        t["reward"][action] = reward
+        if roll is not None:
+            t["roll"][action] = roll
+        if on_ok is not None:
+            t["ok_col"][action], t["ok_val"][action] = on_ok
+        if on_fail is not None:
+            t["fail_col"][action], t["fail_val"][action] = on_fail
+        t["win"][action] = win
+        t["out_ok"][action], t["out_fail"][action], t["out_blocked"][action] = outcomes
+    return t
+
+_T = _build_rule_tables()
+# Module-level arrays so the Numba kernel sees them as compile-time constants
+_LO, _HI, _REWARD, _ROLL = _T["lo"], _T["hi"], _T["reward"], _T["roll"]
+_OK_COL, _OK_VAL, _FAIL_COL, _FAIL_VAL = _T["ok_col"], _T["ok_val"], _T["fail_col"], _T["fail_val"]
+_WIN, _OUT_OK, _OUT_FAIL, _OUT_BLOCKED = _T["win"], _T["out_ok"], _T["out_fail"], _T["out_blocked"]
+
+def _step_kernel(state, actions, rand, reward, done, outcome):
+    """
+    Applies the rule tables to every env, one at a time. state rows are
+    [access_level, ports_found, vuln_found, shell_active, alert_level] (int8),
+    updated in place; reward/done/outcome are written per env.
+    """
+    for i in range(actions.shape[0]):
+        a = actions[i]
+        s = state[i]
+        r = -1.0 # Time penalty
+        d = False
+        
+        met = True
+        for c in range(s.shape[0]):
+            if s[c] < _LO[a, c] or s[c] > _HI[a, c]:
+                met = False
+        
+        if not met:
+            code = _OUT_BLOCKED[a]
+        elif rand[i] > _ROLL[a]:
+            r += _REWARD[a]
+            if _OK_COL[a] >= 0:
+                s[_OK_COL[a]] = _OK_VAL[a]
+            d = _WIN[a]
+            code = _OUT_OK[a]
+        else:
+            if _FAIL_COL[a] >= 0:
+                s[_FAIL_COL[a]] = _FAIL_VAL[a]
+            code = _OUT_FAIL[a]
+        
+        reward[i] = r
+        done[i] = d
+        outcome[i] = code
+
+# Compiled once and cached on disk; None without numba
+_step_kernel_jit = njit(cache=True)(_step_kernel) if NUMBA_AVAILABLE else None
+
+def _build_scalar_rules():
+    """The rule tables as one tuple of Python scalars per action, for the single-env step."""
+    no_limit = np.iinfo(np.int8).max
+    rules = []
+    for a in range(_LO.shape[0]):
+        requires = tuple((c, int(_LO[a, c]), int(_HI[a, c])) for c in range(_LO.shape[1])
+                         if _LO[a, c] > 0 or _HI[a, c] < no_limit)
+        rules.append((requires, float(_REWARD[a]), float(_ROLL[a]),
+                      int(_OK_COL[a]), int(_OK_VAL[a]), int(_FAIL_COL[a]), int(_FAIL_VAL[a]),
+                      bool(_WIN[a]), int(_OUT_OK[a]), int(_OUT_FAIL[a]), int(_OUT_BLOCKED[a])))
+    return tuple(rules)
+
+_SCALAR_RULES = _build_scalar_rules()
+
+# Uniforms the single-env step draws from np_random at a time (same stream as one per step)
+_UNIFORM_BLOCK = 64
+# Every reachable state (access 0-2, the other columns 0-1) -> its float32 observation
+_OBS_CACHE = {
+    state: np.array(state, dtype=np.float32)
+    for state in np.ndindex(3, 2, 2, 2, 2)
+}
+
 class LinuxSecEnv(gym.Env):
     """
     The Red Team Linux Gym.
@@ -15,10 +164,17 @@ class LinuxSecEnv(gym.Env):
     - Current Directory
     - Knowledge (Ports Found, Vulns Found, Credentials Found)
     - Shell Status (No Shell, Reverse Shell, Stability)
+    
+    num_envs > 1 simulates that many independent servers at once: the state
+    lives in arrays and step_batch() advances every episode through the
+    per-action rule tables, as branch-free NumPy lookups (or one
+    Numba-compiled loop when numba is installed).
+    step() is the single-env gym API on top of it.
     """
     
-    def __init__(self):
+    def __init__(self, num_envs=1):
         super(LinuxSecEnv, self).__init__()
+        self.num_envs = num_envs
         
         # ACTIONS (The Red Team Arsenal)
         # 0-4: Recon / Enumeration
@@ -61,101 +217,151 @@ class LinuxSecEnv(gym.Env):
         # 5. Alert Level (0=Silent, 1=Detected)
         self.observation_space = spaces.Box(low=0, high=2, shape=(5,), dtype=np.float32)
         
-        # Game State
-        self.access_level = 0
-        self.ports_found = 0
-        self.vuln_found = 0
-        self.shell_active = 0
-        self.alert_level = 0
-        self.steps = 0
+        # Game State (one row per parallel episode; the named fields are column views)
+        self._state = np.zeros((num_envs, 5), dtype=np.int8)
+        self.access_level = self._state[:, 0]
+        self.ports_found = self._state[:, 1]
+        self.vuln_found = self._state[:, 2]
+        self.shell_active = self._state[:, 3]
+        self.alert_level = self._state[:, 4]
+        self.steps = np.zeros(num_envs, dtype=np.int32)
         self.max_steps = 50
+        # Reused observation buffer; _get_obs overwrites it in place
+        self._obs_buf = np.zeros((num_envs, 5), dtype=np.float32)
+        # Per-step uniforms, drawn in place from the env's seeded np_random (PCG64)
+        self._rand_buf = np.empty(num_envs, dtype=np.float64)
+        # Reused info dicts, one per env; step_batch reassigns their values in place
+        self._infos = [{"action": "", "output": "", "findings": frozenset()} for _ in range(num_envs)]
+        # Findings for every (action, outcome) pair, so steps never scan output text
+        self._findings = [[_step_findings(action, output) for output in _OUTPUTS] for action in self.actions]
+        
+        # Single-env fast path: Python mirrors of state row 0 and the step counter,
+        # plus a block of pre-drawn uniforms (see step)
+        self._state0 = [0] * 5
+        self._steps0 = 0
+        self._uniforms = iter(())
 
     def reset(self, seed=None):
         super().reset(seed=seed)
-        self.access_level = 0
-        self.ports_found = 0
-        self.vuln_found = 0
-        self.shell_active = 0
-        self.alert_level = 0
-        self.steps = 0
-        return self._get_obs(), {}
+        self._state[:] = 0
+        self.steps[:] = 0
+        self._state0 = [0] * 5
+        self._steps0 = 0
+        if seed is not None:
+            self._uniforms = iter(())  # Pre-drawn values came from the old generator
+        obs = self._get_obs()
+        return (obs[0].copy() if self.num_envs == 1 else obs), {}
+
+    def _next_uniform(self):
+        """Next value of the np_random uniform stream, drawn _UNIFORM_BLOCK at a time."""
+        try:
+            return next(self._uniforms)
+        except StopIteration:
+            self._uniforms = iter(self.np_random.random(_UNIFORM_BLOCK).tolist())
+            return next(self._uniforms)
 
     def step(self, action_id):
-        self.steps += 1
+        if self.num_envs != 1:
+            obs, reward, done, truncated, infos = self.step_batch(np.array([action_id]))
+            return obs[0].copy(), float(reward[0]), bool(done[0]), bool(truncated[0]), infos[0]
+        
+        # Single env: apply the action's rule row with Python scalars; no arrays, no kernel
+        (requires, rule_reward, roll, ok_col, ok_val, fail_col, fail_val,
+         win, out_ok, out_fail, out_blocked) = _SCALAR_RULES[action_id]
+        s = self._state0
+        self._steps0 = steps = self._steps0 + 1
+        self.steps[0] = steps
+        u = self._next_uniform()
         reward = -1.0 # Time penalty
         done = False
-        truncated = False
-        info = {"action": self.actions[action_id], "output": "No output."}
-        
-        # --- LOGIC ENGINE ---
-        
-        # RECON PHASE
-        if action_id == 0: # nmap
-            if self.ports_found == 0:
-                self.ports_found = 1
-                reward += 10.0
-                info["output"] = "PORT 22/tcp OPEN (SSH)\nPORT 80/tcp OPEN (HTTP)"
-            else:
-                info["output"] = "Ports already scanned."
-                
-        # EXPLOIT PHASE
-        elif action_id == 5: # Hydra
-            if self.ports_found == 1 and self.access_level == 0:
-                if random.random() > 0.6: # 40% success rate
-                    self.access_level = 1
-                    reward += 50.0
-                    info["output"] = "[SUCCESS] Password found: 'password123'"
-                else:
-                    self.alert_level = 1
-                    info["output"] = "[FAIL] Brute force detected!"
-            else:
-                info["output"] = "Cannot brute force yet."
-
-        elif action_id == 8: # Reverse Shell
-            if self.access_level >= 1 and self.shell_active == 0:
-                self.shell_active = 1
-                reward += 30.0
-                info["output"] = "Connection received from 10.10.10.5!"
-            else:
-                info["output"] = "Failed to trigger shell."
-
-        # PRIVESC PHASE
-        elif action_id == 10: # sudo -l
-            if self.access_level == 1:
-                self.vuln_found = 1
-                reward += 20.0
-                info["output"] = "User may run /usr/bin/vim as root NOPASSWD"
-            else:
-                info["output"] = "Permission denied."
-
-        elif action_id == 14: # Dirty Cow / PrivEsc
-            if self.vuln_found == 1 and self.access_level == 1:
-                self.access_level = 2 # ROOT!
-                reward += 100.0
-                info["output"] = "# whoami\nroot"
-            else:
-                info["output"] = "Exploit failed."
-
-        # LOOT PHASE
-        elif action_id == 12: # Read Flag
-            if self.access_level == 2:
-                reward += 500.0 # WIN CONDITION
-                done = True
-                info["output"] = "CTF{L1nux_R00t_M4st3r}"
-            else:
-                info["output"] = "cat: /root/flag.txt: Permission denied"
+        
+        met = True
+        for c, lo, hi in requires:
+            if not lo <= s[c] <= hi:
+                met = False
+                break
+        
+        if not met:
+            code = out_blocked
+        elif u > roll:
+            reward += rule_reward
+            if ok_col >= 0:
+                s[ok_col] = ok_val
+                self._state[0, ok_col] = ok_val
+            done = win
+            code = out_ok
+        else:
+            if fail_col >= 0:
+                s[fail_col] = fail_val
+                self._state[0, fail_col] = fail_val
+            code = out_fail
+        
+        # Single-env callers keep state across steps (DQN remember), so hand out a copy.
+        # The info dict is reused (its strings are only read right after the step).
+        info = self._infos[0]
+        info["action"] = self.actions[action_id]
+        info["output"] = _OUTPUTS[code]
+        info["findings"] = self._findings[action_id][code]
+        return _OBS_CACHE[tuple(s)].copy(), reward, done, steps >= self.max_steps, info
+
+    def step_batch(self, actions):
+        """Advances every episode by one action. Returns (N, 5) obs and per-env reward/done/truncated/info.
+        
+        The obs array and info dicts are reused: the next step_batch/reset overwrites them.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        self.steps += 1
+        if self.num_envs == 1:
+            # Shares step()'s pre-drawn uniforms so the two can be mixed on one stream
+            self._rand_buf[0] = self._next_uniform()
+            rand = self._rand_buf
+        else:
+            rand = self.np_random.random(out=self._rand_buf)
+        
+        # Single env: the scalar kernel beats array lookups on length-1 arrays; compiled, it wins at any N
+        if _step_kernel_jit is not None or self.num_envs == 1:
+            reward = np.empty(self.num_envs, dtype=np.float32)
+            done = np.empty(self.num_envs, dtype=bool)
+            outcome = np.empty(self.num_envs, dtype=np.int8)
+            (_step_kernel_jit or _step_kernel)(self._state, actions, rand, reward, done, outcome)
+        else:
+            reward, done, outcome = self._step_masks(actions, rand)
 
         # Check Max Steps
-        if self.steps >= self.max_steps:
-            truncated = True
-            
-        return self._get_obs(), reward, done, truncated, info
+        truncated = self.steps >= self.max_steps
+        
+        if self.num_envs == 1:
+            self._state0 = self._state[0].tolist()
+            self._steps0 = int(self.steps[0])
+        
+        infos = self._infos
+        for info, a, o in zip(infos, actions.tolist(), outcome.tolist()):
+            info["action"] = self.actions[a]
+            info["output"] = _OUTPUTS[o]
+            info["findings"] = self._findings[a][o]
+        return self._get_obs(), reward, done, truncated, infos
+
+    def _step_masks(self, actions, rand):
+        """NumPy version of _step_kernel: the same table lookups, branch-free across all envs."""
+        state = self._state
+        met = ((state >= _LO[actions]) & (state <= _HI[actions])).all(axis=1)
+        lucky = rand > _ROLL[actions]
+        ok = met & lucky
+        failed = met & ~lucky
+        
+        reward = -1.0 + ok * _REWARD[actions] # Time penalty + rule reward
+        done = ok & _WIN[actions]
+        outcome = np.where(ok, _OUT_OK[actions], np.where(failed, _OUT_FAIL[actions], _OUT_BLOCKED[actions]))
+        
+        # Each env writes at most one state column
+        rows = np.flatnonzero(ok & (_OK_COL[actions] >= 0))
+        state[rows, _OK_COL[actions[rows]]] = _OK_VAL[actions[rows]]
+        rows = np.flatnonzero(failed & (_FAIL_COL[actions] >= 0))
+        state[rows, _FAIL_COL[actions[rows]]] = _FAIL_VAL[actions[rows]]
+        
+        return reward.astype(np.float32), done, outcome
 
     def _get_obs(self):
-        return np.array([
-            self.access_level,
-            self.ports_found,
-            self.vuln_found,
-            self.shell_active,
-            self.alert_level
-        ], dtype=np.float32)
+        # State rows are already in observation order; widen int8 -> float32 in one copy
+        np.copyto(self._obs_buf, self._state)
+        return self._obs_buf
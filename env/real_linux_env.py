@@ -15,6 +15,12 @@ from tools.tool_executor import ToolExecutor
 from tools.output_parser import OutputParser
 from safety.monitor import get_safety_monitor
 
+# Ports that mark a service as reachable in the observation
+_SSH_PORTS = frozenset((22, 2222))
+_HTTP_PORTS = frozenset((80, 443, 8080))
+# Display names for access_level
+_ACCESS_NAMES = ('None', 'User', 'Root')
+
 class RealLinuxEnv(gym.Env):
     """
     Real pentesting environment using actual tools
@@ -36,7 +42,6 @@ class RealLinuxEnv(gym.Env):
         
         self.target_ip = target_ip
         self.safety = get_safety_monitor()
-        self.parser = OutputParser()
         self.logger = logging.getLogger(__name__)
         
         # Validate target
@@ -97,6 +102,14 @@ class RealLinuxEnv(gym.Env):
         self.credentials = {}
         self.current_user = None
         self.current_password = None
+        # Observation flags derived from the discovery state above. Only
+        # _update_state changes them, so _get_obs never walks the dicts/lists.
+        self._ssh_open = 0.0
+        self._http_open = 0.0
+        self._creds_found = 0.0
+        
+        # Reused observation buffer; _get_obs overwrites it in place
+        self._obs_buf = np.zeros(9, dtype=np.float32)
         
         self.logger.info(f"RealLinuxEnv initialized for target {target_ip}")
     
@@ -117,6 +130,12 @@ class RealLinuxEnv(gym.Env):
         self.credentials = {}
         self.current_user = None
         self.current_password = None
+        self._ssh_open = 0.0
+        self._http_open = 0.0
+        self._creds_found = 0.0
+        # Fresh buffer per episode: VecEnv auto-reset keeps the previous one
+        # as info["terminal_observation"], so it must not be overwritten
+        self._obs_buf = np.zeros(9, dtype=np.float32)
         
         # Reset safety monitor episode counters
         self.safety.reset_episode()
@@ -145,17 +164,20 @@ class RealLinuxEnv(gym.Env):
         # Execute action based on ID
         success, output = self._execute_action(action_id)
         
-        info["output"] = self.parser.summarize_output(output)
+        info["output"] = OutputParser.summarize_output(output)
         info["success"] = success
         
+        # Scan the output once; reward, state update and termination read the flags
+        indicators = OutputParser.scan_indicators(output)
+        
         # Calculate reward based on action outcome
-        reward += self._calculate_reward(action_id, success, output)
+        reward += self._calculate_reward(action_id, success, output, indicators)
         
         # Update state based on action results
-        self._update_state(action_id, success, output)
+        self._update_state(action_id, success, output, indicators)
         
         # Check termination conditions
-        if self.access_level == 2 and "flag" in output.lower():
+        if self.access_level == 2 and indicators["flag_present"]:
             reward += 500.0
             done = True
             info["output"] = "🎉 ROOT FLAG CAPTURED!"
@@ -198,7 +220,6 @@ class RealLinuxEnv(gym.Env):
         # POST-EXPLOITATION (requires credentials)
         elif action_id in [3, 4, 10, 11, 12, 17, 18]:
             if self.current_user and self.current_password:
-                command = self.actions[action_id].split()[0]  # Extract base command
                 return self.executor.execute_ssh_command(
                     self.actions[action_id],
                     self.current_user,
@@ -215,7 +236,7 @@ class RealLinuxEnv(gym.Env):
         else:
             return True, f"[SIMULATED] Action {action_id} not fully implemented"
     
-    def _calculate_reward(self, action_id: int, success: bool, output: str) -> float:
+    def _calculate_reward(self, action_id: int, success: bool, output: str, indicators: Dict) -> float:
         """Calculate reward based on action outcome"""
         reward = 0.0
         
@@ -224,15 +245,15 @@ class RealLinuxEnv(gym.Env):
         
         # RECON rewards
         if action_id == 0:  # nmap
-            parsed = self.parser.parse_nmap_output(output)
+            parsed = OutputParser.parse_nmap_output(output)
             num_ports = len(parsed["open_ports"])
             if num_ports > 0 and self.ports_found == 0:
                 reward += 10.0 + (num_ports * 2.0)  # Bonus for finding ports
         
         # EXPLOITATION rewards
         elif action_id == 5:  # Hydra
-            parsed = self.parser.parse_hydra_output(output)
-            if parsed["success"] and len(self.credentials) == 0:
+            parsed = OutputParser.parse_hydra_output(output)
+            if parsed["success"] and not self._creds_found:
                 reward += 50.0  # Major reward for finding credentials
         
         elif action_id in [8, 9]:  # Reverse shell
@@ -241,16 +262,16 @@ class RealLinuxEnv(gym.Env):
         
         # POST-EXPLOITATION rewards
         elif action_id == 10:  # sudo -l
-            if "NOPASSWD" in output:
+            if indicators["nopasswd"]:
                 reward += 20.0  # Found privilege escalation path
         
         elif action_id == 12:  # cat flag
-            if "flag" in output.lower() or "ctf{" in output.lower():
+            if indicators["flag_present"] or indicators["ctf_flag"]:
                 reward += 100.0  # Found flag
         
         return reward
     
-    def _update_state(self, action_id: int, success: bool, output: str):
+    def _update_state(self, action_id: int, success: bool, output: str, indicators: Dict):
         """Update environment state based on action results"""
         
         if not success:
@@ -259,18 +280,22 @@ class RealLinuxEnv(gym.Env):
         
         # Update from nmap
         if action_id == 0:
-            parsed = self.parser.parse_nmap_output(output)
+            parsed = OutputParser.parse_nmap_output(output)
             if parsed["open_ports"]:
                 self.ports_found = 1
                 self.discovered_ports = parsed["open_ports"]
+                ports = frozenset(self.discovered_ports)
+                self._ssh_open = 0.0 if _SSH_PORTS.isdisjoint(ports) else 1.0
+                self._http_open = 0.0 if _HTTP_PORTS.isdisjoint(ports) else 1.0
                 self.discovered_services = parsed["services"]
         
         # Update from Hydra
         elif action_id == 5:
-            parsed = self.parser.parse_hydra_output(output)
+            parsed = OutputParser.parse_hydra_output(output)
             if parsed["credentials_found"]:
                 cred = parsed["credentials_found"][0]
                 self.credentials[cred["username"]] = cred["password"]
+                self._creds_found = 1.0
                 self.current_user = cred["username"]
                 self.current_password = cred["password"]
                 self.access_level = 1  # Gained user access
@@ -282,8 +307,7 @@ class RealLinuxEnv(gym.Env):
         
         # Update from sudo -l
         elif action_id == 10:
-            parsed = self.parser.parse_ssh_output(output, self.actions[action_id])
-            if parsed["indicators"].get("sudo_nopasswd"):
+            if indicators["nopasswd"]:
                 self.vuln_found = 1  # Found privilege escalation path
         
         # Update from privilege escalation
@@ -294,22 +318,18 @@ class RealLinuxEnv(gym.Env):
     def _get_obs(self):
         """Get current observation"""
         # Enhanced observation with real tool data
-        ssh_open = 1.0 if 22 in self.discovered_ports or 2222 in self.discovered_ports else 0.0
-        http_open = 1.0 if any(p in self.discovered_ports for p in [80, 443, 8080]) else 0.0
-        creds_found = 1.0 if self.credentials else 0.0
-        privilege = float(self.access_level) / 2.0  # Normalize to 0-1
-        
-        return np.array([
-            self.access_level,
-            self.ports_found,
-            self.vuln_found,
-            self.shell_active,
-            self.alert_level,
-            ssh_open,
-            http_open,
-            creds_found,
-            privilege
-        ], dtype=np.float32)
+        # The same buffer is returned every call; VecEnv wrappers copy it
+        b = self._obs_buf
+        b[0] = self.access_level
+        b[1] = self.ports_found
+        b[2] = self.vuln_found
+        b[3] = self.shell_active
+        b[4] = self.alert_level
+        b[5] = self._ssh_open
+        b[6] = self._http_open
+        b[7] = self._creds_found
+        b[8] = self.access_level / 2.0  # privilege, normalized to 0-1
+        return b
     
     def render(self, mode='human'):
         """Render environment state"""
@@ -317,7 +337,7 @@ class RealLinuxEnv(gym.Env):
             print(f"\n{'='*50}")
             print(f"Target: {self.target_ip}")
             print(f"Step: {self.steps}/{self.max_steps}")
-            print(f"Access Level: {['None', 'User', 'Root'][self.access_level]}")
+            print(f"Access Level: {_ACCESS_NAMES[self.access_level]}")
             print(f"Open Ports: {self.discovered_ports}")
             print(f"Credentials: {list(self.credentials.keys())}")
             print(f"Alert Level: {self.alert_level}")
@@ -1,31 +1,65 @@
+import io
 import os
+import sys
 import time
 import argparse
 import numpy as np
 import torch
+import gymnasium as gym
 from sb3_contrib import RecurrentPPO
+from stable_baselines3.common.vec_env import DummyVecEnv
 from env.advanced_env import AdvancedKillChainEnv
+from env.linux_env import LinuxSecEnv
+from agent.dqn_brain import RedTeamAgent
 
-def run_smart_agent(target_ip=None, os_type=None):
+class FixedTargetEnv(gym.Wrapper):
+    """Reuses the target options on every reset, including VecEnv auto-resets."""
+    def __init__(self, env, options):
+        super().__init__(env)
+        self.options = options
+
+    def reset(self, seed=None, options=None):
+        return self.env.reset(seed=seed, options=options or self.options)
+
+# Loaded policies, keyed on (model path, device), so repeated runs in one process skip the reload
+_model_cache = {}
+
+def load_model(model_path, device):
+    """Loads the RecurrentPPO policy, reusing it if this process already has it."""
+    key = (os.path.abspath(model_path), device.type)
+    model = _model_cache.get(key)
+    if model is None:
+        model = RecurrentPPO.load(model_path, device=device)
+        _model_cache[key] = model
+    return model
+
+def _flush_log(log):
+    """Writes a buffered step log to stdout in one call and empties it."""
+    sys.stdout.write(log.getvalue())
+    sys.stdout.flush()
+    log.seek(0)
+    log.truncate()
+
+def run_smart_agent(target_ip=None, os_type=None, num_envs=1, episodes=1, verbose=True, render_delay=0.0,
+                    model_path="redteam_lstm_final.zip"):
     print("🚀 Initializing Red Team Agent Runner...")
     
     # Check GPU
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Hardware Acceleration: {device.type.upper()}")
+    if device.type == 'cuda':
+        torch.backends.cudnn.benchmark = True  # Auto-tune the LSTM kernels for the fixed batch
+        torch.set_float32_matmul_precision('high')  # TF32 matmuls on Ampere+
+        print(f"   ⚡ TF32 Math: ENABLED")
 
-    model_path = "redteam_lstm_final.zip"
     if not os.path.exists(model_path):
         print(f"❌ Error: Model file '{model_path}' not found. Please train the agent first.")
         return
 
     print(f"📂 Loading Model: {model_path}")
     
-    # Load Model
-    model = RecurrentPPO.load(model_path, device=device)
-    
-    # Initialize Environment
-    print("🌍 Initializing Environment...")
-    env = AdvancedKillChainEnv()
+    # Load Model (cached after the first run)
+    model = load_model(model_path, device)
     
     # Configure Target
     options = {}
@@ -33,59 +67,181 @@ def run_smart_agent(target_ip=None, os_type=None):
         options['target_ip'] = target_ip
     if os_type:
         options['os_type'] = os_type
+    
+    # Initialize Environments (one batched policy forward per step across all of them)
+    num_envs = max(1, min(num_envs, episodes))
+    print(f"🌍 Initializing {num_envs} Environment(s)...")
+    env = DummyVecEnv([lambda: FixedTargetEnv(AdvancedKillChainEnv(), options)] * num_envs)
         
     print(f"🎯 Target: {options.get('target_ip', '127.0.0.1')} ({options.get('os_type', 'Random')})")
     
     # --- EVALUATION LOOP ---
-    print("\n🎬 Starting Evaluation Episode...")
-    obs, _ = env.reset(options=options)
+    print(f"\n🎬 Starting {episodes} Evaluation Episode(s)...")
+    obs = env.reset()
     
     # LSTM states
     lstm_states = None
-    num_envs = 1
     episode_starts = np.ones((num_envs,), dtype=bool)
     
-    done = False
-    total_reward = 0
-    step_count = 0
+    # Split the episodes evenly across envs (same scheme as SB3 evaluate_policy)
+    episode_counts = np.zeros(num_envs, dtype=int)
+    episode_targets = np.array([(episodes + i) // num_envs for i in range(num_envs)], dtype=int)
+    current_rewards = np.zeros(num_envs)
+    current_steps = np.zeros(num_envs, dtype=int)
+    episode_rewards = []
+    episode_lengths = []
+    # Per-env step logs, written out once per episode (or every step when watching)
+    step_logs = [io.StringIO() for _ in range(num_envs)]
     
     try:
-        while not done:
-            # Predict action
-            action, lstm_states = model.predict(
-                obs, 
-                state=lstm_states, 
-                episode_start=episode_starts,
-                deterministic=True
-            )
+        # Evaluation only: no autograd bookkeeping around the policy forwards
+        with torch.inference_mode():
+            while (episode_counts < episode_targets).any():
+                # Predict actions for every env in one forward
+                actions, lstm_states = model.predict(
+                    obs, 
+                    state=lstm_states, 
+                    episode_start=episode_starts,
+                    deterministic=True
+                )
+                
+                # Step environments (finished ones auto-reset)
+                obs, rewards, dones, infos = env.step(actions)
+                episode_starts = dones
+                
+                current_rewards += rewards
+                current_steps += 1
+                
+                for i in range(num_envs):
+                    if episode_counts[i] >= episode_targets[i]:
+                        continue
+                    
+                    # Log Step Info
+                    if verbose:
+                        prefix = f"[Env {i}] " if num_envs > 1 else ""
+                        step_logs[i].write(f"{prefix}Step {current_steps[i]}: Action: {infos[i]['action']}\n"
+                                           f"   └── Output: {infos[i].get('output', '')}\n")
+                        if render_delay:
+                            _flush_log(step_logs[i])
+                    
+                    if dones[i]:
+                        _flush_log(step_logs[i])
+                        episode_rewards.append(current_rewards[i])
+                        episode_lengths.append(current_steps[i])
+                        episode_counts[i] += 1
+                        print("-" * 50)
+                        print(f"🏁 Episode Finished.")
+                        print(f"💰 Total Reward: {current_rewards[i]}")
+                        print(f"👣 Total Steps: {current_steps[i]}")
+                        current_rewards[i] = 0
+                        current_steps[i] = 0
+                
+                # Optional: Add a small delay for readability
+                if render_delay:
+                    time.sleep(render_delay)
             
-            # Step environment
-            obs, reward, terminated, truncated, info = env.step(action)
-            done = terminated or truncated
-            episode_starts = np.array([done])
-            
-            total_reward += reward
-            step_count += 1
-            
-            # Print Step Info
-            print(f"Step {step_count}: Action: {info['action']}")
-            print(f"   └── Output: {info.get('output', '')}")
-            
-            # Optional: Add a small delay for readability
-            time.sleep(0.5)
-            
-        print("-" * 50)
-        print(f"🏁 Episode Finished.")
-        print(f"💰 Total Reward: {total_reward}")
-        print(f"👣 Total Steps: {step_count}")
+        if episodes > 1:
+            print("=" * 50)
+            print(f"📊 Mean Reward: {np.mean(episode_rewards):.2f} +/- {np.std(episode_rewards):.2f}")
+            print(f"👣 Mean Steps: {np.mean(episode_lengths):.1f}")
+
+    except KeyboardInterrupt:
+        for log in step_logs:
+            _flush_log(log)
+        print("\n🛑 Execution interrupted by user.")
+    finally:
+        env.close()
 
+def run_agent(model_path, episodes=1, num_envs=None, verbose=True, render_delay=0.0):
+    """Deploys a trained DQN checkpoint (.pth) on the simulated Linux server."""
+    print("🚀 Initializing Red Team Agent Deployment...")
+    
+    if not os.path.exists(model_path):
+        print(f"❌ Error: Model file '{model_path}' not found. Please train the agent first.")
+        return
+    
+    agent = RedTeamAgent(state_dim=5, action_dim=20)
+    agent.load(model_path)
+    agent.brain.eval()  # Greedy deployment: no dropout
+    
+    # Episodes run side by side in one vectorized env (one per core by default),
+    # so each step is a single batched forward for every server
+    num_envs = max(1, min(num_envs or os.cpu_count() or 1, episodes))
+    env = LinuxSecEnv(num_envs=num_envs)
+    print(f"🎯 Target: Linux Server (Simulated) x{num_envs}")
+    print(f"\n🎬 Starting {episodes} Deployment Episode(s)...")
+    
+    episode_rewards = []
+    episode_lengths = []
+    # Per-env step logs, written out once per episode (or every step when watching)
+    step_logs = [io.StringIO() for _ in range(num_envs)]
+    
+    try:
+        while len(episode_rewards) < episodes:
+            # One round: up to num_envs episodes in lockstep
+            states, _ = env.reset()
+            states = states.reshape(num_envs, -1)
+            active = np.arange(num_envs) < episodes - len(episode_rewards)
+            total_rewards = np.zeros(num_envs)
+            step_counts = np.zeros(num_envs, dtype=int)
+            
+            while active.any():
+                actions = agent.act_batch(states, training=False)
+                states, rewards, dones, truncs, infos = env.step_batch(actions)
+                
+                total_rewards[active] += rewards[active]
+                step_counts[active] += 1
+                
+                if verbose:
+                    for i in np.flatnonzero(active):
+                        prefix = f"[Env {i}] " if num_envs > 1 else ""
+                        step_logs[i].write(f"{prefix}Step {step_counts[i]}: {infos[i]['action']}\n"
+                                           f"   └── {infos[i]['output']}\n"
+                                           f"   └── Reward: {rewards[i]:.1f}\n")
+                        if render_delay:
+                            _flush_log(step_logs[i])
+                if render_delay:
+                    time.sleep(render_delay)
+                
+                # Finished envs keep stepping until the round ends, but are no longer counted
+                finished = active & (dones | truncs)
+                for i in np.flatnonzero(finished):
+                    _flush_log(step_logs[i])
+                    episode_rewards.append(total_rewards[i])
+                    episode_lengths.append(step_counts[i])
+                    print("-" * 50)
+                    print(f"🏁 Episode {len(episode_rewards)} Finished: {'🏆 ROOT FLAG' if dones[i] else '⏱️ Timeout'}")
+                    print(f"💰 Total Reward: {total_rewards[i]:.1f}")
+                    print(f"👣 Total Steps: {step_counts[i]}")
+                active &= ~finished
+        
+        if episodes > 1:
+            print("=" * 50)
+            print(f"📊 Mean Reward: {np.mean(episode_rewards):.2f} +/- {np.std(episode_rewards):.2f}")
+            print(f"👣 Mean Steps: {np.mean(episode_lengths):.1f}")
+    
     except KeyboardInterrupt:
+        for log in step_logs:
+            _flush_log(log)
         print("\n🛑 Execution interrupted by user.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--target_ip", type=str, help="Target IP Address")
     parser.add_argument("--os_type", type=str, help="Target OS (Linux, Windows, macOS)")
+    parser.add_argument("--model", type=str, default="redteam_lstm_final.zip",
+                        help="RecurrentPPO .zip, or a DQN .pth checkpoint (runs on the simulated Linux server)")
+    parser.add_argument("--episodes", type=int, default=1, help="Number of evaluation episodes")
+    parser.add_argument("--num-envs", type=int, default=None,
+                        help="Parallel environments sharing one batched predict (default: 1, or one per CPU core for .pth)")
+    parser.add_argument("--quiet", action="store_true", help="No per-step output")
+    parser.add_argument("--render-delay", type=float, default=0.0, help="Seconds to pause after each step (e.g. 0.5 to watch)")
     args = parser.parse_args()
     
-    run_smart_agent(target_ip=args.target_ip, os_type=args.os_type)
+    if args.model.endswith(".pth"):
+        run_agent(args.model, episodes=args.episodes, num_envs=args.num_envs,
+                  verbose=not args.quiet, render_delay=args.render_delay)
+    else:
+        run_smart_agent(target_ip=args.target_ip, os_type=args.os_type,
+                        num_envs=args.num_envs or 1, episodes=args.episodes, verbose=not args.quiet,
+                        render_delay=args.render_delay, model_path=args.model)
@@ -6,9 +6,12 @@ Generates report of findings.
 """
 
 import os
-import time
+import sys
 import json
 import argparse
+import numpy as np
+import torch
+from pathlib import Path
 import gymnasium as gym
 from stable_baselines3 import PPO
 from datetime import datetime
@@ -16,57 +19,102 @@ from datetime import datetime
 from env.real_linux_env import RealLinuxEnv
 from safety.monitor import get_safety_monitor
 
-def generate_report(env, info_history, reward_history):
-    """Generate simple JSON/Markdown report of findings"""
-    report_dir = "reports/"
-    os.makedirs(report_dir, exist_ok=True)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# services are keyed by int port, hence NON_STR_KEYS
+_ORJSON_OPTS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                if ORJSON_AVAILABLE else 0)
+
+REPORT_DIR = Path("reports")
+
+# Progress lines are buffered and written to stdout every LOG_BATCH steps
+LOG_BATCH = 32
+
+def _dumps(obj, indent=False) -> bytes:
+    """Encode obj as JSON bytes with orjson, or the stdlib encoder as fallback"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=_ORJSON_OPTS | (orjson.OPT_INDENT_2 if indent else 0))
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def stream_json_report(fh, report, action_rows):
+    """Write the report header fields, then the action log one row at a time"""
+    # Reopen the indented header object to append the log array to it
+    fh.write(_dumps(report, indent=True)[:-1].rstrip())
+    fh.write(b',\n  "action_log": [')
+    sep = b"\n    "
+    for row in action_rows:
+        fh.write(sep)
+        fh.write(_dumps(row))
+        sep = b",\n    "
+    fh.write(b"\n  ]\n}\n")
+
+def generate_report(env, actions, outputs, successes, total_reward):
+    """Generate simple JSON/Markdown report of findings from the per-step columns"""
+    REPORT_DIR.mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     report = {
         "target": env.target_ip,
         "timestamp": timestamp,
-        "total_steps": len(info_history),
-        "total_reward": sum(reward_history),
+        "total_steps": len(actions),
+        "total_reward": float(total_reward),
         "findings": {
             "open_ports": env.discovered_ports,
             "services": env.discovered_services,
             "credentials": env.credentials,
             "access_level": ["None", "User", "Root"][env.access_level],
             "flags_found": env.access_level == 2
-        },
-        "action_log": info_history
+        }
     }
     
-    # Save JSON
-    json_path = f"{report_dir}/report_{timestamp}.json"
-    with open(json_path, 'w') as f:
-        json.dump(report, f, indent=2)
+    # Save JSON (action log streamed row by row, never built as one tree)
+    json_path = REPORT_DIR / f"report_{timestamp}.json"
+    action_rows = (
+        {"action": action, "target": env.target_ip, "output": output, "success": success}
+        for action, output, success in zip(actions, outputs, successes.tolist())
+    )
+    with open(json_path, 'wb') as f:
+        stream_json_report(f, report, action_rows)
         
     # Save Markdown Summary
-    md_path = f"{report_dir}/report_{timestamp}.md"
-    with open(md_path, 'w') as f:
-        f.write(f"# Pentest Report - {env.target_ip}\n\n")
-        f.write(f"**Date:** {timestamp}\n")
-        f.write(f"**Status:** {'✅ SUCCESS' if env.access_level == 2 else '⚠️ PARTIAL'}\n\n")
-        
-        f.write("## 🔍 Findings\n")
-        f.write(f"- **Access Level:** {report['findings']['access_level']}\n")
-        f.write(f"- **Open Ports:** {report['findings']['open_ports']}\n")
-        f.write(f"- **Credentials:** {len(report['findings']['credentials'])} found\n")
-        
-        if report['findings']['credentials']:
-            f.write("\n### Credentials Discovered\n")
-            for user, password in report['findings']['credentials'].items():
-                f.write(f"- `{user}:{password}`\n")
-        
-        f.write("\n## 📜 Action Log\n")
-        for i, info in enumerate(info_history):
-            icon = "✅" if info.get("success", True) else "❌"
-            f.write(f"{i+1}. {icon} **{info['action']}**: {info.get('output', '').splitlines()[0]}\n")
-            
+    md_path = REPORT_DIR / f"report_{timestamp}.md"
+    # Assemble the whole document and write it in one go
+    findings = report['findings']
+    parts = [
+        f"# Pentest Report - {env.target_ip}\n\n",
+        f"**Date:** {timestamp}\n",
+        f"**Status:** {'✅ SUCCESS' if env.access_level == 2 else '⚠️ PARTIAL'}\n\n",
+        "## 🔍 Findings\n",
+        f"- **Access Level:** {findings['access_level']}\n",
+        f"- **Open Ports:** {findings['open_ports']}\n",
+        f"- **Credentials:** {len(findings['credentials'])} found\n",
+    ]
+    
+    if findings['credentials']:
+        parts.append("\n### Credentials Discovered\n")
+        parts.extend(f"- `{user}:{password}`\n" for user, password in findings['credentials'].items())
+    
+    parts.append("\n## 📜 Action Log\n")
+    for i, (action, output, success) in enumerate(zip(actions, outputs, successes)):
+        icon = "✅" if success else "❌"
+        parts.append(f"{i+1}. {icon} **{action}**: {output.splitlines()[0]}\n")
+    
+    md_path.write_text("".join(parts), encoding="utf-8")
+    
     print(f"\n📄 Report generated: {md_path}")
 
-def run_real_agent(target_ip="172.20.0.10", model_path="redteam_real_v1.zip"):
+def _flush_pending(pending):
+    """Writes queued progress lines to stdout in one call and clears the queue"""
+    if pending:
+        sys.stdout.write("\n".join(pending) + "\n")
+        sys.stdout.flush()
+        pending.clear()
+
+def run_real_agent(target_ip="172.20.0.10", model_path="redteam_real_v1.zip", report=True):
     print(f"🚀 Initializing Real Pentest against {target_ip}...")
     
     # Check Model
@@ -76,6 +124,9 @@ def run_real_agent(target_ip="172.20.0.10", model_path="redteam_real_v1.zip"):
     else:
         print(f"📂 Loading model: {model_path}")
         model = PPO.load(model_path)
+        model.policy.set_training_mode(False)
+        # One observation per step: intra-op threads only add scheduling overhead
+        torch.set_num_threads(1)
     
     # Initialize Environment
     try:
@@ -88,15 +139,24 @@ def run_real_agent(target_ip="172.20.0.10", model_path="redteam_real_v1.zip"):
     
     done = False
     total_reward = 0
-    info_history = []
-    reward_history = []
+    
+    # Per-step history as columns; the env truncates at max_steps
+    max_steps = env.max_steps
+    actions = [None] * max_steps
+    outputs = [None] * max_steps
+    successes = np.zeros(max_steps, dtype=bool)
+    step_idx = 0
+    pending = []
     
     print("\n🎬 Starting Episode...")
     
     try:
         while not done:
             if model:
-                action, _ = model.predict(obs, deterministic=True)
+                # Straight to the policy, skipping predict()'s per-call wrapping
+                with torch.inference_mode():
+                    obs_tensor, _ = model.policy.obs_to_tensor(obs)
+                    action = model.policy._predict(obs_tensor, deterministic=True).item()
             else:
                 action = env.action_space.sample() # Random for testing
                 
@@ -104,27 +164,37 @@ def run_real_agent(target_ip="172.20.0.10", model_path="redteam_real_v1.zip"):
             done = terminated or truncated
             
             total_reward += reward
-            info_history.append(info)
-            reward_history.append(reward)
+            actions[step_idx] = info.get("action")
+            outputs[step_idx] = info.get("output", info.get("error", ""))
+            successes[step_idx] = info.get("success", True)
+            step_idx += 1
             
-            # Print Progress
-            step_num = len(info_history)
-            print(f"Step {step_num}: {info['action']}")
-            print(f"   └── {info.get('output', '').splitlines()[0]}")
+            # Queue Progress
+            step_num = step_idx
+            pending.append(f"Step {step_num}: {info['action']}\n"
+                           f"   └── {info.get('output', '').splitlines()[0]}")
+            if step_num % LOG_BATCH == 0:
+                _flush_pending(pending)
             
             if done:
+                _flush_pending(pending)
                 print(f"\n🏁 Episode Finished. Total Reward: {total_reward}")
                 
     except KeyboardInterrupt:
+        _flush_pending(pending)
         print("\n🛑 Execution interrupted")
         
     finally:
-        generate_report(env, info_history, reward_history)
+        _flush_pending(pending)
+        if report:
+            generate_report(env, actions[:step_idx], outputs[:step_idx],
+                            successes[:step_idx], total_reward)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Real Pentest Agent")
     parser.add_argument("--target", type=str, default="172.20.0.10", help="Target IP address")
     parser.add_argument("--model", type=str, default="redteam_real_v1.zip", help="Path to trained model")
+    parser.add_argument("--no-report", action="store_true", help="Skip writing the JSON/Markdown report")
     
     args = parser.parse_args()
-    run_real_agent(args.target, args.model)
+    run_real_agent(args.target, args.model, report=not args.no_report)
@@ -8,23 +8,98 @@ Enforces security controls to prevent misuse:
 - Audit logging
 """
 
+import os
+import re
 import json
 import time
+import queue
+import atexit
 import ipaddress
 import logging
+import logging.handlers
 from pathlib import Path
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Blocked regardless of the configured blocked_commands
+DANGEROUS_PATTERNS = (
+    "rm -rf /",
+    "mkfs",
+    "dd if=/dev/zero",
+    ":(){ :|:& };:",  # Fork bomb
+    "> /dev/sda",
+    "chmod -R 777 /",
+)
+
+# Distinct commands remembered by sanitize_command (oldest evicted first)
+SANITIZE_CACHE_SIZE = 4096
+
+class _AuditFileHandler(logging.FileHandler):
+    """FileHandler that leaves records in the stream buffer instead of flushing each one"""
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _AuditBuffer(logging.handlers.MemoryHandler):
+    """MemoryHandler whose flush writes the whole batch to its file target at once"""
+    
+    def flush(self):
+        with self.lock:
+            super().flush()
+            if self.target:
+                self.target.flush()
+
+
+AUDIT_LOG_DIR = Path("logs/audit")
+
+# Package loggers routed to the audit log (monitor, tool executor, real env)
+AUDIT_LOGGERS = ("safety", "tools", "env")
+
 class SafetyMonitor:
     """Monitors and enforces safety controls for pentesting actions"""
     
+    # Audit logging pipeline, shared by every monitor in the process
+    _logging_ready = False
+    _audit_buffer: Optional[_AuditBuffer] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    
     def __init__(self, config_path: str = "safety/whitelist.json"):
         self.config_path = Path(config_path)
         self.config = self._load_config()
         
+        # Single multi-pattern scanner over blocked commands + dangerous patterns
+        self._blocked_cmds = tuple(self.config.get("blocked_commands", []))
+        self._blocked_scanner = self._build_scanner(self._blocked_cmds + DANGEROUS_PATTERNS)
+        # command -> block message, None if safe
+        self._sanitize_cache: Dict[str, Optional[str]] = {}
+        
+        # Whitelist lookups parsed once: raw strings, address set, network objects, port set.
+        # Entries that aren't valid IPs / networks are skipped (and logged below), so a
+        # hostname or CIDR in allowed_targets never whitelists a target
+        self._invalid_whitelist_entries: List[Tuple[object, Exception]] = []
+        allowed_targets = self._parse_whitelist(ipaddress.ip_address, self.config.get("allowed_targets", []))
+        self._allowed_target_strs = frozenset(entry for entry, _ in allowed_targets)
+        self._allowed_ip_set = frozenset(address for _, address in allowed_targets)
+        self._allowed_networks = self._parse_whitelist(
+            ipaddress.ip_network, self.config.get("allowed_ip_ranges", [])
+        )
+        self._allowed_port_set = frozenset(self.config.get("allowed_ports", []))
+        
         # Rate limiting tracking
-        self.action_timestamps: List[float] = []
+        self.action_timestamps: Deque[float] = deque()
         self.episode_action_count = 0
         
         # Setup logging
@@ -33,6 +108,9 @@ class SafetyMonitor:
         # Emergency kill switch
         self.kill_switch_active = False
         
+        for entry, error in self._invalid_whitelist_entries:
+            self.logger.warning("⚠️ Ignoring invalid whitelist entry %r: %s", entry, error)
+        
     def _load_config(self) -> Dict:
         """Load safety configuration from JSON file"""
         if not self.config_path.exists():
@@ -41,22 +119,68 @@ class SafetyMonitor:
         with open(self.config_path, 'r') as f:
             return json.load(f)
     
+    def _parse_whitelist(self, parse, entries) -> List[Tuple[str, object]]:
+        """Parse whitelist entries with an ipaddress constructor, keeping (entry, parsed) pairs for the valid ones"""
+        parsed = []
+        for entry in entries:
+            try:
+                parsed.append((entry, parse(entry)))
+            except (ValueError, TypeError) as e:
+                self._invalid_whitelist_entries.append((entry, e))
+        return parsed
+    
+    @staticmethod
+    def _build_scanner(patterns):
+        """Compile substring patterns into one scanner (Aho-Corasick, else regex alternation)"""
+        if AHOCORASICK_AVAILABLE:
+            automaton = ahocorasick.Automaton()
+            for pattern in patterns:
+                automaton.add_word(pattern, pattern)
+            automaton.make_automaton()
+            return lambda command: next(automaton.iter(command), None) is not None
+        return re.compile("|".join(map(re.escape, patterns))).search
+    
     def _setup_logging(self):
-        """Setup audit logging"""
-        log_dir = Path("logs/audit")
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        log_file = log_dir / f"audit_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        """Setup audit logging (the pipeline is built once per process)"""
+        self.logger = logging.getLogger(__name__)
         
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
+        if not SafetyMonitor._logging_ready:
+            AUDIT_LOG_DIR.mkdir(parents=True, exist_ok=True)
+            log_file = AUDIT_LOG_DIR / f"audit_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+            
+            # Audit records are buffered and written to the file in batches;
+            # errors (blocked commands) and the kill switch flush immediately
+            audit_buffer = _AuditBuffer(
+                capacity=256,
+                flushLevel=logging.ERROR,
+                target=_AuditFileHandler(log_file)
+            )
+            
+            # Callers only enqueue records; a listener thread does the file and
+            # console I/O off the action path
+            log_queue = queue.Queue(-1)
+            listener = logging.handlers.QueueListener(
+                log_queue,
+                audit_buffer,
                 logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+            )
+            listener.start()
+            atexit.register(listener.stop)
+            
+            # Attached to the agent's own package loggers, leaving the root
+            # logger (and whatever the host program configured) untouched
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            queue_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            for name in AUDIT_LOGGERS:
+                audit_logger = logging.getLogger(name)
+                audit_logger.setLevel(logging.INFO)
+                audit_logger.addHandler(queue_handler)
+                audit_logger.propagate = False
+            
+            SafetyMonitor._audit_buffer = audit_buffer
+            SafetyMonitor._listener = listener
+            SafetyMonitor._logging_ready = True
+        
         self.logger.info("Safety Monitor initialized")
     
     def validate_target_ip(self, target_ip: str) -> bool:
@@ -69,36 +193,38 @@ class SafetyMonitor:
         Returns:
             True if IP is allowed, False otherwise
         """
+        # Exact whitelist hit needs no parsing
+        if target_ip in self._allowed_target_strs:
+            self.logger.info("✓ Target IP %s is explicitly whitelisted", target_ip)
+            return True
+        
         try:
             target = ipaddress.ip_address(target_ip)
             
-            # Check explicit allowed targets
-            if target_ip in self.config.get("allowed_targets", []):
-                self.logger.info(f"✓ Target IP {target_ip} is explicitly whitelisted")
+            # Check explicit allowed targets (other spellings of the same address)
+            if target in self._allowed_ip_set:
+                self.logger.info("✓ Target IP %s is explicitly whitelisted", target_ip)
                 return True
             
             # Check IP ranges
-            for ip_range in self.config.get("allowed_ip_ranges", []):
-                network = ipaddress.ip_network(ip_range)
+            for ip_range, network in self._allowed_networks:
                 if target in network:
-                    self.logger.info(f"✓ Target IP {target_ip} is in allowed range {ip_range}")
+                    self.logger.info("✓ Target IP %s is in allowed range %s", target_ip, ip_range)
                     return True
             
-            self.logger.warning(f"✗ Target IP {target_ip} is NOT in whitelist - BLOCKED")
+            self.logger.warning("✗ Target IP %s is NOT in whitelist - BLOCKED", target_ip)
             return False
             
         except ValueError as e:
-            self.logger.error(f"Invalid IP address: {target_ip} - {e}")
+            self.logger.error("Invalid IP address: %s - %s", target_ip, e)
             return False
     
     def validate_port(self, port: int) -> bool:
         """Validate that port is in allowed list"""
-        allowed_ports = self.config.get("allowed_ports", [])
-        
-        if port in allowed_ports:
+        if port in self._allowed_port_set:
             return True
         
-        self.logger.warning(f"✗ Port {port} is not in allowed list - BLOCKED")
+        self.logger.warning("✗ Port %s is not in allowed list - BLOCKED", port)
         return False
     
     def check_rate_limit(self) -> bool:
@@ -108,24 +234,25 @@ class SafetyMonitor:
         Returns:
             True if action is allowed, False if rate limit exceeded
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         max_per_minute = self.config.get("max_actions_per_minute", 30)
         
-        # Remove timestamps older than 1 minute
-        self.action_timestamps = [
-            ts for ts in self.action_timestamps 
-            if current_time - ts < 60
-        ]
+        # Remove timestamps older than 1 minute (oldest are at the left)
+        timestamps = self.action_timestamps
+        while timestamps and current_time - timestamps[0] >= 60:
+            timestamps.popleft()
         
         # Check rate limit
         if len(self.action_timestamps) >= max_per_minute:
-            self.logger.warning(f"✗ Rate limit exceeded: {len(self.action_timestamps)}/{max_per_minute} actions per minute")
+            self.logger.warning("✗ Rate limit exceeded: %d/%d actions per minute",
+                                len(self.action_timestamps), max_per_minute)
             return False
         
         # Check episode limit
         max_per_episode = self.config.get("max_actions_per_episode", 100)
         if self.episode_action_count >= max_per_episode:
-            self.logger.warning(f"✗ Episode action limit exceeded: {self.episode_action_count}/{max_per_episode}")
+            self.logger.warning("✗ Episode action limit exceeded: %d/%d",
+                                self.episode_action_count, max_per_episode)
             return False
         
         return True
@@ -139,13 +266,14 @@ class SafetyMonitor:
             target: Target IP/host
             success: Whether action succeeded
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         self.action_timestamps.append(current_time)
         self.episode_action_count += 1
         
-        if self.config.get("log_all_commands", True):
-            status = "SUCCESS" if success else "FAILED"
-            self.logger.info(f"[{status}] Action: {action} | Target: {target}")
+        # Skip building the record entirely when INFO is filtered out
+        if self.config.get("log_all_commands", True) and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("[%s] Action: %s | Target: %s",
+                             "SUCCESS" if success else "FAILED", action, target)
     
     def sanitize_command(self, command: str) -> Optional[str]:
         """
@@ -157,29 +285,31 @@ class SafetyMonitor:
         Returns:
             Sanitized command if safe, None if blocked
         """
-        # Check blocked commands
-        blocked = self.config.get("blocked_commands", [])
-        for blocked_cmd in blocked:
-            if blocked_cmd in command:
-                self.logger.error(f"✗ BLOCKED dangerous command: {command}")
-                return None
-        
-        # Additional safety checks
-        dangerous_patterns = [
-            "rm -rf /",
-            "mkfs",
-            "dd if=/dev/zero",
-            ":(){ :|:& };:",  # Fork bomb
-            "> /dev/sda",
-            "chmod -R 777 /",
-        ]
-        
-        for pattern in dangerous_patterns:
-            if pattern in command:
-                self.logger.error(f"✗ BLOCKED dangerous pattern in command: {command}")
-                return None
-        
-        return command
+        try:
+            message = self._sanitize_cache[command]
+        except KeyError:
+            message = self._scan_command(command)
+            cache = self._sanitize_cache
+            if len(cache) >= SANITIZE_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[command] = message
+        
+        if message is None:
+            return command
+        
+        # Blocked commands are audited on every attempt, cached or not
+        self.logger.error(message, command)
+        return None
+    
+    def _scan_command(self, command: str) -> Optional[str]:
+        """Return the audit message for a blocked command, None if it is safe"""
+        if not self._blocked_scanner(command):
+            return None
+        
+        # Rare path: report which list matched, blocked_commands first
+        if any(blocked_cmd in command for blocked_cmd in self._blocked_cmds):
+            return "✗ BLOCKED dangerous command: %s"
+        return "✗ BLOCKED dangerous pattern in command: %s"
     
     def activate_kill_switch(self, reason: str):
         """
@@ -189,7 +319,8 @@ class SafetyMonitor:
             reason: Reason for activation
         """
         self.kill_switch_active = True
-        self.logger.critical(f"🚨 EMERGENCY KILL SWITCH ACTIVATED: {reason}")
+        self.logger.critical("🚨 EMERGENCY KILL SWITCH ACTIVATED: %s", reason)
+        self._flush_audit()
     
     def is_kill_switch_active(self) -> bool:
         """Check if kill switch is active"""
@@ -199,6 +330,19 @@ class SafetyMonitor:
         """Reset episode-specific counters"""
         self.episode_action_count = 0
         self.logger.info("Episode counters reset")
+        self._flush_audit()
+    
+    def _flush_audit(self):
+        """Write queued and buffered audit records to the log file and sync it to disk"""
+        # Stopping the listener drains the queue before its thread exits
+        self._listener.stop()
+        self._listener.start()
+        self._audit_buffer.flush()
+        
+        file_handler = self._audit_buffer.target
+        with file_handler.lock:
+            if file_handler.stream is not None:
+                os.fsync(file_handler.stream.fileno())
     
     def get_stats(self) -> Dict:
         """Get current safety statistics"""
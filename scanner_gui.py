@@ -12,7 +12,7 @@ import threading
 import queue
 import sys
 import os
-from datetime import datetime
+import time
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -21,6 +21,43 @@ from env.linux_env import LinuxSecEnv
 from agent.dqn_brain import RedTeamAgent
 from utils.report_generator import ReportGenerator
 
+# Oldest log lines are dropped beyond this, so long training runs don't bog down the Text widget
+MAX_LOG_LINES = 5000
+
+# GUI training runs a replay (learning) step every TRAIN_FREQ environment steps
+TRAIN_FREQ = 4
+
+# Static agent summary shown in the stats panel
+STATS_BANNER = """
+╔═══════════════════════════════════╗
+║      AGENT SPECIFICATIONS         ║
+╠═══════════════════════════════════╣
+║ Architecture: Dueling Double DQN  ║
+║ Neurons: 8192 → 4096 → 2048 → 1024║
+║ Batch Size: 4096                  ║
+║ Memory: 50,000 experiences        ║
+║ GPU: CUDA Enabled                 ║
+║ Optimization: TF32 + CuDNN        ║
+╠═══════════════════════════════════╣
+║      ACTION CAPABILITIES          ║
+╠═══════════════════════════════════╣
+║ Reconnaissance: 5 actions         ║
+║ Initial Access: 5 actions         ║
+║ Privilege Escalation: 5 actions   ║
+║ Persistence: 5 actions            ║
+║ Total: 20 tactical actions        ║
+╠═══════════════════════════════════╣
+║      REWARD STRUCTURE             ║
+╠═══════════════════════════════════╣
+║ Port Discovery: +10               ║
+║ User Access: +50                  ║
+║ Reverse Shell: +30                ║
+║ Vuln Discovery: +20               ║
+║ Privilege Escalation: +100        ║
+║ Root Flag: +500 (WIN)             ║
+╚═══════════════════════════════════╝
+"""
+
 class RedTeamGUI:
     def __init__(self, root):
         self.root = root
@@ -44,6 +81,13 @@ class RedTeamGUI:
         self.model_path_var = tk.StringVar(value="checkpoints/redteam_best.pth")
         self.is_running = False
         self.log_queue = queue.Queue()
+        # Log timestamps have 1 s resolution, so the formatted string is reused within a second
+        self._last_ts_sec = 0
+        self._last_ts_str = ""
+        # Set while a <<LogArrived>> event is posted but not yet handled
+        self._drain_pending = False
+        # (episode, episodes, best reward), written by the training thread
+        self._train_progress = None
         
         self._setup_ui()
         self._start_log_updater()
@@ -164,52 +208,50 @@ class RedTeamGUI:
                                   font=("Courier New", 9))
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Producers post this after queueing a message; the Tk loop drains on it
+        self.root.bind('<<LogArrived>>', self._drain_logs)
+        
     def log(self, message):
         self.log_queue.put(message)
+        if not self._drain_pending:
+            self._drain_pending = True
+            try:
+                self.root.event_generate('<<LogArrived>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                pass  # Tk loop not running; the periodic drain picks it up
         
     def _start_log_updater(self):
+        # Safety net for messages whose event was lost; normal drains are event-driven
+        self._drain_logs()
+        self.root.after(1000, self._start_log_updater)
+        
+    def _drain_logs(self, event=None):
+        # Drain everything queued since the last drain into a single insert
+        self._drain_pending = False
+        msgs = []
         try:
             while True:
-                msg = self.log_queue.get_nowait()
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                self.log_text.insert(tk.END, f"[{timestamp}] {msg}\n")
-                self.log_text.see(tk.END)
+                msgs.append(self.log_queue.get_nowait())
         except queue.Empty:
             pass
-        self.root.after(100, self._start_log_updater)
+        if msgs:
+            now = int(time.time())
+            if now != self._last_ts_sec:
+                self._last_ts_sec = now
+                self._last_ts_str = time.strftime('%H:%M:%S', time.localtime(now))
+            timestamp = self._last_ts_str
+            self.log_text.insert(tk.END, "".join(f"[{timestamp}] {msg}\n" for msg in msgs))
+            
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > MAX_LOG_LINES:
+                self.log_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
+            self.log_text.see(tk.END)
         
     def _update_stats(self):
-        stats = f"""
-╔═══════════════════════════════════╗
-║      AGENT SPECIFICATIONS         ║
-╠═══════════════════════════════════╣
-║ Architecture: Dueling Double DQN  ║
-║ Neurons: 8192 → 4096 → 2048 → 1024║
-║ Batch Size: 4096                  ║
-║ Memory: 50,000 experiences        ║
-║ GPU: CUDA Enabled                 ║
-║ Optimization: TF32 + CuDNN        ║
-╠═══════════════════════════════════╣
-║      ACTION CAPABILITIES          ║
-╠═══════════════════════════════════╣
-║ Reconnaissance: 5 actions         ║
-║ Initial Access: 5 actions         ║
-║ Privilege Escalation: 5 actions   ║
-║ Persistence: 5 actions            ║
-║ Total: 20 tactical actions        ║
-╠═══════════════════════════════════╣
-║      REWARD STRUCTURE             ║
-╠═══════════════════════════════════╣
-║ Port Discovery: +10               ║
-║ User Access: +50                  ║
-║ Reverse Shell: +30                ║
-║ Vuln Discovery: +20               ║
-║ Privilege Escalation: +100        ║
-║ Root Flag: +500 (WIN)             ║
-╚═══════════════════════════════════╝
-"""
+        self.stats_text.config(state=tk.NORMAL)
         self.stats_text.delete(1.0, tk.END)
-        self.stats_text.insert(1.0, stats)
+        self.stats_text.insert(1.0, STATS_BANNER)
+        self.stats_text.config(state=tk.DISABLED)
         
     def browse_model(self):
         filename = filedialog.askopenfilename(
@@ -251,7 +293,19 @@ class RedTeamGUI:
             self.status_bar.config(text=f"Training: 0/{episodes} episodes")
             self.log_text.delete(1.0, tk.END)
             
+            self._train_progress = None
             threading.Thread(target=self._run_training, args=(episodes,), daemon=True).start()
+            self.root.after(200, self._refresh_status)
+            
+    def _refresh_status(self):
+        # Polled on the Tk thread while training runs; the worker only writes the tuple
+        if not self.is_running:
+            return
+        progress = self._train_progress
+        if progress is not None:
+            ep, episodes, best_reward = progress
+            self.status_bar.config(text=f"Training: {ep}/{episodes} episodes | Best: {best_reward:.1f}")
+        self.root.after(200, self._refresh_status)
             
     def start_deployment(self):
         model_path = self.model_path_var.get()
@@ -276,6 +330,8 @@ class RedTeamGUI:
             
             env = LinuxSecEnv()
             agent = RedTeamAgent(state_dim=5, action_dim=20)
+            # Epsilon decays per replay; keep the same schedule per environment step
+            agent.epsilon_decay **= TRAIN_FREQ
             
             os.makedirs("checkpoints", exist_ok=True)
             
@@ -285,6 +341,15 @@ class RedTeamGUI:
             self.log("=" * 60)
             
             best_reward = -float('inf')
+            total_steps = 0
+            
+            reporter = ReportGenerator()
+            log_action = reporter.log_action
+            add_finding = reporter.add_finding
+            act_fn = agent.act
+            step_fn = env.step
+            remember = agent.remember
+            replay = agent.replay
             
             for e in range(episodes):
                 state, _ = env.reset()
@@ -292,49 +357,53 @@ class RedTeamGUI:
                 done = False
                 step_count = 0
                 
-                reporter = ReportGenerator(target_name=f"Sim_Server_{e}")
+                reporter.reset(target_name=f"Sim_Server_{e}")
                 
                 while not done:
-                    action = agent.act(state)
-                    next_state, reward, terminated, truncated, info = env.step(action)
+                    action = act_fn(state)
+                    next_state, reward, terminated, truncated, info = step_fn(action)
                     done = terminated or truncated
                     step_count += 1
+                    total_steps += 1
+                    action_name = info['action']
+                    output = info['output']
                     
-                    reporter.log_action(info['action'], info['output'])
+                    log_action(action_name, output)
                     
-                    if "SUCCESS" in info['output']:
-                        reporter.add_finding("Weak Credentials", "HIGH", 
-                                           f"Found password via brute force: {info['output']}")
-                    if "Connection received" in info['output']:
-                        reporter.add_finding("Remote Code Execution", "CRITICAL",
-                                           "Reverse shell established.")
-                    if "root" in info['output'] and "whoami" in info['action']:
-                        reporter.add_finding("Privilege Escalation", "CRITICAL",
-                                           "Root access achieved.")
+                    findings = info['findings']
+                    if "weak_credentials" in findings:
+                        add_finding("Weak Credentials", "HIGH", 
+                                    f"Found password via brute force: {output}")
+                    if "rce" in findings:
+                        add_finding("Remote Code Execution", "CRITICAL",
+                                    "Reverse shell established.")
+                    if "privesc" in findings:
+                        add_finding("Privilege Escalation", "CRITICAL",
+                                    "Root access achieved.")
                     
-                    agent.remember(state, action, reward, next_state, done)
+                    remember(state, action, reward, next_state, done)
                     state = next_state
                     total_reward += reward
                     
-                    agent.replay()
+                    if total_steps % TRAIN_FREQ == 0:
+                        replay()
                 
                 # Save best model
                 if total_reward > best_reward:
                     best_reward = total_reward
                     best_path = os.path.join("checkpoints", "redteam_best.pth")
-                    agent.save(best_path)
+                    agent.save_async(best_path)
                 
                 # Save checkpoint every 50 episodes
                 if (e + 1) % 50 == 0:
                     checkpoint_path = os.path.join("checkpoints", f"redteam_ep{e+1}.pth")
-                    agent.save(checkpoint_path)
+                    agent.save_async(checkpoint_path)
                 
                 # Progress reporting
                 if (e + 1) % 10 == 0:
                     self.log(f"Episode {e+1}/{episodes} | Score: {total_reward:.1f} | "
                             f"Steps: {step_count} | Epsilon: {agent.epsilon:.3f} | Best: {best_reward:.1f}")
-                    self.root.after(0, lambda ep=e+1: self.status_bar.config(
-                        text=f"Training: {ep}/{episodes} episodes | Best: {best_reward:.1f}"))
+                    self._train_progress = (e + 1, episodes, best_reward)
             
             # Save final model
             final_path = os.path.join("checkpoints", "redteam_final.pth")
@@ -377,30 +446,38 @@ class RedTeamGUI:
             step_count = 0
             
             reporter = ReportGenerator(target_name="Target_Server")
+            log_action = reporter.log_action
+            add_finding = reporter.add_finding
+            log = self.log
+            act_fn = agent.act
+            step_fn = env.step
             
             while not done:
-                action = agent.act(state, training=False)
-                next_state, reward, terminated, truncated, info = env.step(action)
+                action = act_fn(state, training=False)
+                next_state, reward, terminated, truncated, info = step_fn(action)
                 done = terminated or truncated
                 
                 step_count += 1
                 total_reward += reward
+                action_name = info['action']
+                output = info['output']
                 
-                reporter.log_action(info['action'], info['output'])
+                log_action(action_name, output)
                 
-                if "SUCCESS" in info['output']:
-                    reporter.add_finding("Weak Credentials", "HIGH",
-                                       f"Found password via brute force: {info['output']}")
-                if "Connection received" in info['output']:
-                    reporter.add_finding("Remote Code Execution", "CRITICAL",
-                                       "Reverse shell established.")
-                if "root" in info['output'] and "whoami" in info['action']:
-                    reporter.add_finding("Privilege Escalation", "CRITICAL",
-                                       "Root access achieved.")
+                findings = info['findings']
+                if "weak_credentials" in findings:
+                    add_finding("Weak Credentials", "HIGH",
+                                f"Found password via brute force: {output}")
+                if "rce" in findings:
+                    add_finding("Remote Code Execution", "CRITICAL",
+                                "Reverse shell established.")
+                if "privesc" in findings:
+                    add_finding("Privilege Escalation", "CRITICAL",
+                                "Root access achieved.")
                 
-                self.log(f"Step {step_count}: {info['action']}")
-                self.log(f"   └── {info['output']}")
-                self.log(f"   └── Reward: {reward:.1f}")
+                log(f"Step {step_count}: {action_name}")
+                log(f"   └── {output}")
+                log(f"   └── Reward: {reward:.1f}")
                 
                 state = next_state
             
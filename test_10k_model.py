@@ -2,12 +2,13 @@
 Test the 10k-step trained LSTM model to see what it learned.
 """
 import os
+import sys
 import numpy as np
 import torch
-from sb3_contrib import RecurrentPPO
 from env.advanced_env import AdvancedKillChainEnv
+from run_agent import load_model
 
-def test_model(num_episodes=5):
+def test_model(num_episodes=5, verbose=False):
     print("=" * 70)
     print("🧪 TESTING 10K-STEP TRAINED MODEL")
     print("=" * 70)
@@ -24,11 +25,19 @@ def test_model(num_episodes=5):
         return
     
     print(f"📂 Loading Model: {model_path}")
-    model = RecurrentPPO.load(model_path, device=device)
+    model = load_model(model_path, device)
     
     # Initialize Environment
     env = AdvancedKillChainEnv()
     
+    # Drive the policy directly: LSTM state stays on the device between steps
+    # instead of round-tripping through numpy inside model.predict
+    policy = model.policy
+    policy.set_training_mode(False)
+    zero_state = torch.zeros(policy.lstm_hidden_state_shape, device=policy.device)
+    episode_start = torch.ones(1, device=policy.device)
+    episode_continue = torch.zeros(1, device=policy.device)
+    
     print(f"\n🎯 Running {num_episodes} test episodes...\n")
     
     episode_rewards = []
@@ -41,37 +50,46 @@ def test_model(num_episodes=5):
         print(f"{'='*70}")
         
         obs, _ = env.reset()
-        lstm_states = None
-        episode_starts = np.ones((1,), dtype=bool)
+        lstm_states = (zero_state, zero_state)
+        episode_starts = episode_start
         
         done = False
         total_reward = 0
         step_count = 0
         actions_taken = []
+        step_lines = []
         
         while not done:
             # Predict action
-            action, lstm_states = model.predict(
-                obs, 
-                state=lstm_states, 
-                episode_start=episode_starts,
-                deterministic=True
-            )
+            with torch.inference_mode():
+                obs_tensor, _ = policy.obs_to_tensor(obs)
+                actions, lstm_states = policy._predict(
+                    obs_tensor,
+                    lstm_states=lstm_states,
+                    episode_starts=episode_starts,
+                    deterministic=True
+                )
+            action = actions.item()
             
             # Step environment
             obs, reward, terminated, truncated, info = env.step(action)
             done = terminated or truncated
-            episode_starts = np.array([done])
+            episode_starts = episode_continue
             
             total_reward += reward
             step_count += 1
             actions_taken.append(info['action'])
             
-            # Print step info
-            output = info.get('output', 'No output.')
-            print(f"  Step {step_count:2d}: {info['action']:<35} | Reward: {reward:6.2f}")
-            if output and output != "No output.":
-                print(f"           └─ {output}")
+            # Collect step info, written once per episode
+            if verbose:
+                output = info.get('output', 'No output.')
+                step_lines.append(f"  Step {step_count:2d}: {info['action']:<35} | Reward: {reward:6.2f}")
+                if output and output != "No output.":
+                    step_lines.append(f"           └─ {output}")
+        
+        if step_lines:
+            sys.stdout.write("\n".join(step_lines))
+            sys.stdout.write("\n")
         
         episode_rewards.append(total_reward)
         episode_lengths.append(step_count)
@@ -85,24 +103,26 @@ def test_model(num_episodes=5):
         print(f"  👣 Steps Taken: {step_count}")
         print(f"  📊 Success: {'✅ YES' if total_reward > 0 else '❌ NO'}")
     
-    # Summary Statistics
+    # Summary Statistics (convert once, reduce on the arrays)
+    rewards = np.asarray(episode_rewards, dtype=np.float64)
+    lengths = np.asarray(episode_lengths, dtype=np.float64)
+    avg_reward = rewards.mean()
+    
     print(f"\n{'='*70}")
     print("📊 OVERALL STATISTICS")
     print(f"{'='*70}")
     print(f"  Episodes Run: {num_episodes}")
     print(f"  Successful Episodes: {successful_episodes}/{num_episodes} ({successful_episodes/num_episodes*100:.1f}%)")
-    print(f"  Average Reward: {np.mean(episode_rewards):.2f} ± {np.std(episode_rewards):.2f}")
-    print(f"  Best Reward: {np.max(episode_rewards):.2f}")
-    print(f"  Worst Reward: {np.min(episode_rewards):.2f}")
-    print(f"  Average Steps: {np.mean(episode_lengths):.1f}")
+    print(f"  Average Reward: {avg_reward:.2f} ± {rewards.std():.2f}")
+    print(f"  Best Reward: {rewards.max():.2f}")
+    print(f"  Worst Reward: {rewards.min():.2f}")
+    print(f"  Average Steps: {lengths.mean():.1f}")
     print(f"{'='*70}")
     
     # Capability Assessment
     print("\n🎓 CAPABILITY ASSESSMENT (10K Steps Training)")
     print(f"{'='*70}")
     
-    avg_reward = np.mean(episode_rewards)
-    
     if avg_reward > 100:
         print("  ✅ EXCELLENT: Agent consistently completes objectives")
         print("     - Understands kill chain progression")
@@ -131,4 +151,4 @@ def test_model(num_episodes=5):
     print(f"{'='*70}\n")
 
 if __name__ == "__main__":
-    test_model(num_episodes=5)
+    test_model(num_episodes=5, verbose=True)
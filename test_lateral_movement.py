@@ -10,8 +10,10 @@ from env.advanced_env import AdvancedKillChainEnv
 
 def test_lateral_movement():
     print("🚀 Testing Lateral Movement Capabilities...")
+    # The env draws its outcomes from the stdlib RNG; seed it so every run takes the same path
+    random.seed(0)
     env = AdvancedKillChainEnv()
-    obs, _ = env.reset()
+    obs, _ = env.reset(seed=0)
     
     print(f"Target OS: {env.current_os}")
     
@@ -34,7 +36,7 @@ def test_lateral_movement():
 
     # 2. Test Lateral Pivot (Action 26 - SMB Pass The Hash)
     print("\n🔗 Action: SMB_Pass_The_Hash (26)")
-    # Force success for testing if possible, but it's random. Let's try a few times.
+    # Outcome is random per attempt (fixed by the seed above); stop at the first success
     for i in range(3):
         obs, reward, done, _, info = env.step(26)
         print(f"   └── Attempt {i+1}: {info['output']}")
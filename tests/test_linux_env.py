@@ -0,0 +1,118 @@
+"""
+Test Simulated Environment - LinuxSecEnv step paths
+
+Tests:
+- Scripted kill chain outcomes (single env)
+- step() and step_batch() agree on a single env
+- Numba kernel, pure-Python kernel and NumPy mask paths agree
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import env.linux_env as linux_env
+from env.linux_env import LinuxSecEnv
+
+# Mostly rule actions (nmap, hydra, shell, sudo -l, dirty cow, flag) plus a no-op
+RULE_ACTIONS = [0, 5, 8, 10, 14, 12, 19]
+
+def _run_batch(num_envs, actions, seed=0):
+    """Steps a seeded env through actions (one row per step) and collects every output"""
+    env = LinuxSecEnv(num_envs)
+    env.reset(seed=seed)
+    trace = []
+    for row in actions:
+        obs, reward, done, truncated, infos = env.step_batch(row)
+        trace.append((obs.copy(), reward.copy(), done.copy(), truncated.copy(),
+                      [info["output"] for info in infos]))
+    return trace
+
+class TestLinuxSecEnv(unittest.TestCase):
+    """Test the simulated Linux environment"""
+
+    def assertTracesEqual(self, expected, actual):
+        for step, (a, b) in enumerate(zip(expected, actual)):
+            for x, y in zip(a[:4], b[:4]):
+                np.testing.assert_array_equal(x, y, err_msg=f"step {step}")
+            self.assertEqual(a[4], b[4], f"step {step}")
+
+    def test_scripted_kill_chain(self):
+        """Test the single-env step against the known kill chain outcomes"""
+        env = LinuxSecEnv()
+        obs, _ = env.reset(seed=0)
+        np.testing.assert_array_equal(obs, [0, 0, 0, 0, 0])
+
+        # Out of order: nothing to brute force yet
+        obs, reward, done, _, info = env.step(5)
+        self.assertEqual((reward, done, info["output"]), (-1.0, False, "Cannot brute force yet."))
+
+        obs, reward, _, _, info = env.step(0)
+        self.assertEqual(reward, 9.0)
+        np.testing.assert_array_equal(obs, [0, 1, 0, 0, 0])
+
+        # Hydra rolls; a failed attempt raises the alert, a success grants user access
+        for _ in range(100):
+            obs, reward, _, _, info = env.step(5)
+            if obs[0] == 1:
+                break
+            self.assertEqual((reward, info["output"]), (-1.0, "[FAIL] Brute force detected!"))
+            self.assertEqual(obs[4], 1)
+        self.assertEqual(reward, 49.0)
+        self.assertIn("weak_credentials", info["findings"])
+
+        for action, expected_reward, column in ((8, 29.0, 3), (10, 19.0, 2)):
+            obs, reward, _, _, _ = env.step(action)
+            self.assertEqual(reward, expected_reward)
+            self.assertEqual(obs[column], 1)
+
+        obs, reward, _, _, info = env.step(14)
+        self.assertEqual((reward, obs[0], info["output"]), (99.0, 2, "# whoami\nroot"))
+
+        obs, reward, done, _, info = env.step(12)
+        self.assertEqual((reward, done, info["output"]), (499.0, True, "CTF{L1nux_R00t_M4st3r}"))
+
+    def test_step_matches_step_batch_single_env(self):
+        """Test that the scalar step() and step_batch() give the same seeded trajectory"""
+        rng = np.random.default_rng(1)
+        actions = rng.choice(RULE_ACTIONS, size=(300, 1))
+
+        env = LinuxSecEnv()
+        env.reset(seed=0)
+        trace = []
+        for (action,) in actions:
+            obs, reward, done, truncated, info = env.step(int(action))
+            trace.append((obs[None], np.array([reward], dtype=np.float32), np.array([done]),
+                          np.array([truncated]), [info["output"]]))
+
+        self.assertTracesEqual(_run_batch(1, actions), trace)
+        with mock.patch.object(linux_env, "_step_kernel_jit", None):
+            self.assertTracesEqual(_run_batch(1, actions), trace)
+
+    def test_batch_paths_agree(self):
+        """Test that the Numba kernel, pure-Python kernel and NumPy masks agree"""
+        rng = np.random.default_rng(2)
+        actions = rng.choice(RULE_ACTIONS, size=(200, 64))
+
+        with mock.patch.object(linux_env, "_step_kernel_jit", linux_env._step_kernel):
+            kernel = _run_batch(64, actions)
+        with mock.patch.object(linux_env, "_step_kernel_jit", None):
+            masks = _run_batch(64, actions)
+        self.assertTracesEqual(kernel, masks)
+
+        # The episode must actually progress for the comparison to mean anything
+        self.assertTrue(any(step[2].any() for step in kernel))
+
+        if linux_env.NUMBA_AVAILABLE:
+            self.assertTracesEqual(kernel, _run_batch(64, actions))
+
+if __name__ == '__main__':
+    print("Running Simulated Environment Tests...")
+    print("=" * 60)
+    unittest.main(verbosity=2)
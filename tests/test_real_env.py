@@ -11,13 +11,28 @@ Tests:
 import unittest
 import sys
 import os
-import numpy as np
+import functools
+import subprocess
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from env.real_linux_env import RealLinuxEnv
 
+@functools.lru_cache(maxsize=1)
+def _docker_target_running():
+    """Check once per process whether the redteam_target container is up"""
+    try:
+        result = subprocess.run(
+            ["docker", "ps", "--filter", "name=redteam_target", "--format", "{{.Names}}"],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+    except Exception:
+        return False
+    return "redteam_target" in result.stdout
+
 class TestRealLinuxEnv(unittest.TestCase):
     """Test Real Linux Environment"""
     
@@ -56,6 +71,8 @@ class TestRealLinuxEnv(unittest.TestCase):
     
     def test_step_wait_action(self):
         """Test simple wait action (should always work)"""
+        import numpy as np
+        
         self.env.reset()
         
         # Action 19 is "wait"
@@ -89,6 +106,7 @@ class TestRealLinuxEnv(unittest.TestCase):
     
     def test_episode_termination(self):
         """Test that episode terminates after max steps"""
+        self.env.max_steps = 3  # Truncation logic is the same at any limit
         self.env.reset()
         
         # Run for max_steps + 1
@@ -104,23 +122,16 @@ class TestRealLinuxEnvIntegration(unittest.TestCase):
     
     def setUp(self):
         """Check if Docker container is running"""
-        import subprocess
+        if not _docker_target_running():
+            self.skipTest("Docker containers not running. Run 'docker-compose up -d' first.")
+        
         try:
-            result = subprocess.run(
-                ["docker", "ps", "--filter", "name=redteam_target", "--format", "{{.Names}}"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if "redteam_target" not in result.stdout:
-                self.skipTest("Docker containers not running. Run 'docker-compose up -d' first.")
-            
             self.env = RealLinuxEnv(target_ip="172.20.0.10")
-            
         except Exception as e:
             self.skipTest(f"Docker not available: {e}")
     
+    @unittest.skipUnless(os.environ.get("RUN_SLOW_INTEGRATION"),
+                         "slow: set RUN_SLOW_INTEGRATION=1 to run real nmap/hydra")
     def test_full_episode_simulation(self):
         """Test a full episode with multiple actions"""
         obs, _ = self.env.reset()
@@ -9,9 +9,13 @@ Tests:
 - Tool execution (mocked)
 """
 
+import json
+import tempfile
 import unittest
+import subprocess
 import sys
 import os
+from unittest import mock
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -41,6 +45,22 @@ class TestSafetyControls(unittest.TestCase):
         result = self.safety.validate_target_ip("192.168.1.1")
         self.assertFalse(result, "Private IP outside whitelist should be blocked")
     
+    def test_whitelist_ignores_non_ip_targets(self):
+        """Test that hostnames or CIDRs in allowed_targets don't whitelist anything"""
+        with open("safety/whitelist.json") as f:
+            config = json.load(f)
+        config["allowed_targets"] = ["172.20.0.10", "scanme.example.com", "10.0.0.0/8"]
+        config["allowed_ip_ranges"] = []
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "whitelist.json")
+            with open(config_path, "w") as f:
+                json.dump(config, f)
+            safety = SafetyMonitor(config_path)
+        
+        results = [safety.validate_target_ip(t) for t in config["allowed_targets"]]
+        self.assertEqual(results, [True, False, False])
+    
     def test_port_validation_allowed(self):
         """Test that allowed ports pass validation"""
         result = self.safety.validate_port(22)
@@ -102,19 +122,119 @@ class TestToolExecutor(unittest.TestCase):
         with self.assertRaises(ValueError):
             executor = ToolExecutor("8.8.8.8")
     
-    def test_nmap_execution_format(self):
-        """Test nmap command execution (may fail if nmap not installed)"""
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_execution_format(self, mock_run):
+        """Test nmap command execution (subprocess mocked, no real scan)"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout="22/tcp open ssh", stderr=""
+        )
         executor = ToolExecutor("172.20.0.10")
         
-        # This will execute real nmap if available, or fail gracefully
-        # We just check it doesn't crash
-        try:
-            success, output = executor.execute_nmap("-sV")
-            self.assertIsInstance(success, bool)
-            self.assertIsInstance(output, str)
-        except Exception as e:
-            # If nmap not available or target not reachable, that's okay for unit test
-            print(f"Note: nmap test skipped - {e}")
+        success, output = executor.execute_nmap("-sV")
+        self.assertIsInstance(success, bool)
+        self.assertIsInstance(output, str)
+        self.assertTrue(success)
+        self.assertEqual(output, "22/tcp open ssh")
+        
+        # The scan is built for the whitelisted target
+        argv = mock_run.call_args[0][0]
+        self.assertEqual(argv[0], "nmap")
+        self.assertIn("172.20.0.10", argv)
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_batch_merges_profiles(self, mock_run):
+        """Test that compatible scan profiles share a single nmap run"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout="22/tcp open ssh", stderr=""
+        )
+        executor = ToolExecutor("172.20.0.10")
+        
+        results = executor.execute_nmap_batch(["-sV", "-O -p 22", "-sV -p-"])
+        self.assertEqual(results, [(True, "22/tcp open ssh")] * 3)
+        self.assertEqual(mock_run.call_count, 1)
+        
+        argv = mock_run.call_args[0][0]
+        self.assertIn("-sV", argv)
+        self.assertIn("-O", argv)
+        self.assertIn("-p-", argv)
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_batch_keeps_option_values(self, mock_run):
+        """Test that valued options and quoted arguments survive merging"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout="22/tcp open ssh", stderr=""
+        )
+        executor = ToolExecutor("172.20.0.10")
+        
+        executor.execute_nmap_batch(["-sV --max-retries 2", "-O --min-rate 2"])
+        executor.execute_nmap_batch(["--script vuln", "--script http-title"])
+        executor.execute_nmap_batch(["-sV --script-args 'http.useragent=a b'"])
+        
+        argvs = [call[0][0] for call in mock_run.call_args_list]
+        for argv in argvs:
+            # The whitelisted target is the only positional argument
+            self.assertEqual(argv[-1], "172.20.0.10")
+            self.assertEqual(argv[argv.index("--host-timeout") + 1], "10s")
+        
+        def value_of(option):
+            return [argv[argv.index(option) + 1] for argv in argvs if option in argv]
+        
+        self.assertEqual(value_of("--max-retries"), ["2"])
+        self.assertEqual(value_of("--min-rate"), ["2"])
+        self.assertEqual(value_of("--script"), ["vuln", "http-title"])
+        self.assertEqual(value_of("--script-args"), ["http.useragent=a b"])
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_batch_keeps_scope_flags_apart(self, mock_run):
+        """Test that -F / -sn profiles don't narrow or replace another profile's scan"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout="22/tcp open ssh", stderr=""
+        )
+        executor = ToolExecutor("172.20.0.10")
+        
+        executor.execute_nmap_batch(["-sV", "-F", "-sn"])
+        argvs = [call[0][0] for call in mock_run.call_args_list]
+        self.assertEqual(len(argvs), 3)
+        self.assertEqual([[flag for flag in argv if flag in ("-sV", "-F", "-sn")] for argv in argvs],
+                         [["-sV"], ["-F"], ["-sn"]])
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_rejects_extra_targets(self, mock_run):
+        """Test that scan flags cannot add targets outside the whitelist"""
+        executor = ToolExecutor("172.20.0.10")
+        
+        for flags in ("-sV 8.8.8.8", "-iL hosts.txt", "-sV --script-args a b"):
+            success, _ = executor.execute_nmap(flags)
+            self.assertFalse(success)
+        mock_run.assert_not_called()
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_nmap_repeat_scan_uses_cache(self, mock_run):
+        """Test that repeating a scan within the TTL reuses the previous result"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout="22/tcp open ssh", stderr=""
+        )
+        executor = ToolExecutor("172.20.0.10")
+        
+        first = executor.execute_nmap("-sV")
+        self.assertEqual(executor.execute_nmap("-sV"), first)
+        self.assertEqual(mock_run.call_count, 1)
+        
+        # A different scan, or an expired entry, runs nmap again
+        executor.execute_nmap("-O")
+        executor.nmap_cache_ttl = 0
+        executor.execute_nmap("-sV")
+        self.assertEqual(mock_run.call_count, 3)
+    
+    @mock.patch('tools.tool_executor.subprocess.run')
+    def test_generic_echo_runs_in_process(self, mock_run):
+        """Test that plain echo is answered without spawning a process"""
+        executor = ToolExecutor("172.20.0.10")
+        
+        success, output = executor.execute_generic_command("echo hello  world")
+        self.assertTrue(success)
+        self.assertEqual(output, "hello world\n")
+        mock_run.assert_not_called()
 
 if __name__ == '__main__':
     print("Running Safety and Tool Executor Tests...")
@@ -5,25 +5,49 @@ Extracts and catalogs shell commands from HoneyPot data.
 """
 
 import json
+import os
 import re
-from typing import List, Dict, Set
+import sys
+from typing import Dict, Iterator, List, Set
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Files up to this size are parsed in one go; larger ones are streamed
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+# Command families tracked in CommandLibrary.command_patterns
+COMMAND_TYPES = ('wget', 'curl', 'chmod', 'sh', 'bash', 'python', 'perl',
+                 'nc',  # netcat
+                 'cat')
+
+def _iter_entries(json_path: str) -> Iterator[Dict]:
+    """Yield the entries of a HoneyPot JSON array (orjson for typical sizes, ijson streaming for huge files)."""
+    if IJSON_AVAILABLE and (not ORJSON_AVAILABLE or os.path.getsize(json_path) > STREAM_THRESHOLD_BYTES):
+        with open(json_path, 'rb') as f:
+            yield from ijson.items(f, 'item')
+    elif ORJSON_AVAILABLE:
+        with open(json_path, 'rb') as f:
+            yield from orjson.loads(f.read())
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
 
 class CommandLibrary:
     """Manages real-world command patterns from HoneyPot data."""
     
     def __init__(self, unified_data_path: str = None):
         self.commands = []
-        self.command_patterns = {
-            'wget': [],
-            'curl': [],
-            'chmod': [],
-            'sh': [],
-            'bash': [],
-            'python': [],
-            'perl': [],
-            'nc': [],  # netcat
-            'cat': []
-        }
+        self.command_patterns = {cmd_type: [] for cmd_type in COMMAND_TYPES}
         self.malware_indicators = []
         self.stealthy_commands = []  # Low-severity commands
         self.aggressive_commands = []  # High-severity commands
@@ -36,24 +60,27 @@ class CommandLibrary:
         print(f"🍯 Loading commands from {json_path}...")
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
             command_set = set()
+            # dicts as insertion-ordered sets: repeated droppers are kept once
+            patterns = {k: dict.fromkeys(v) for k, v in self.command_patterns.items()}
             
-            for entry in data:
+            for entry in _iter_entries(json_path):
                 payload = entry.get('input', {}).get('payload', '')
                 attack_type = entry.get('label', {}).get('attack_type', '')
+                payload_lc = payload.lower()
                 
                 # Focus on Command Injection attacks
-                if 'Command Injection' in attack_type or 'wget' in payload.lower() or 'curl' in payload.lower():
+                if 'Command Injection' in attack_type or 'wget' in payload_lc or 'curl' in payload_lc:
                     # Extract commands
-                    for cmd_type in self.command_patterns.keys():
-                        if cmd_type in payload.lower():
-                            command_set.add(payload[:200])  # Limit length
-                            self.command_patterns[cmd_type].append(payload[:200])
+                    hits = [cmd_type for cmd_type in COMMAND_TYPES if cmd_type in payload_lc]
+                    if hits:
+                        trimmed = sys.intern(payload[:200])  # Limit length; repeats share one object
+                        command_set.add(trimmed)
+                        for cmd_type in hits:
+                            patterns[cmd_type][trimmed] = None
             
             self.commands = list(command_set)
+            self.command_patterns = {k: list(v) for k, v in patterns.items()}
             
             print(f"   ✅ Extracted {len(self.commands)} unique commands")
             for cmd_type, cmds in self.command_patterns.items():
@@ -82,39 +109,46 @@ class CommandLibrary:
         print(f"🍯 Loading unified Kaggle data from {json_path}...")
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
             command_set = set()
             malware_set = set()
+            # dicts as insertion-ordered sets: repeated droppers are kept once
+            stealthy = dict.fromkeys(self.stealthy_commands)
+            aggressive = dict.fromkeys(self.aggressive_commands)
+            patterns = {k: dict.fromkeys(v) for k, v in self.command_patterns.items()}
             
-            for entry in data:
+            for entry in _iter_entries(json_path):
                 payload = entry.get('input', {}).get('payload', '')
                 attack_type = entry.get('label', {}).get('attack_type', '')
                 severity = entry.get('label', {}).get('severity', 'medium')
                 malware_indicator = entry.get('label', {}).get('malware_indicator', '')
+                payload_lc = payload.lower()
                 
                 # Extract malware indicators
                 if malware_indicator:
                     malware_set.add(malware_indicator)
                 
                 # Focus on Command Injection attacks
-                if 'Command Injection' in attack_type or any(cmd in payload.lower() for cmd in ['wget', 'curl', 'chmod']):
-                    command_set.add(payload[:200])
+                if ('Command Injection' in attack_type or 'wget' in payload_lc
+                        or 'curl' in payload_lc or 'chmod' in payload_lc):
+                    trimmed = sys.intern(payload[:200])  # Repeated payloads share one object
+                    command_set.add(trimmed)
                     
                     # Categorize by severity
                     if severity == 'low':
-                        self.stealthy_commands.append(payload[:200])
+                        stealthy[trimmed] = None
                     elif severity == 'high':
-                        self.aggressive_commands.append(payload[:200])
+                        aggressive[trimmed] = None
                     
                     # Extract specific command patterns
-                    for cmd_type in self.command_patterns.keys():
-                        if cmd_type in payload.lower():
-                            self.command_patterns[cmd_type].append(payload[:200])
+                    for cmd_type in COMMAND_TYPES:
+                        if cmd_type in payload_lc:
+                            patterns[cmd_type][trimmed] = None
             
             self.commands = list(command_set)
             self.malware_indicators = list(malware_set)
+            self.stealthy_commands = list(stealthy)
+            self.aggressive_commands = list(aggressive)
+            self.command_patterns = {k: list(v) for k, v in patterns.items()}
             
             print(f"   ✅ Extracted {len(self.commands)} unique commands")
             print(f"   ✅ Found {len(self.malware_indicators)} malware indicators")
@@ -7,17 +7,41 @@ Extracts useful information from:
 - SSH command outputs
 """
 
+import itertools
 import re
-from typing import Dict, List, Optional
+from typing import Dict
 import logging
 
+import numpy as np
+
+# Patterns are compiled once at import instead of on every parse call
+# Pattern: 22/tcp   open  ssh     OpenSSH 7.6p1
+_PORT_RE = re.compile(r'(\d+)/(tcp|udp)\s+open\s+(\S+)\s*(.*)?')
+_OS_RE = re.compile(r'OS details:\s*(.+)')
+# Matched within a single line so .*? can't backtrack across a multi-KB report
+_SCAN_RE = re.compile(r'Nmap scan report for[^\n]*?(\d+)\s+ports?\s+scanned')
+# Pattern: [22][ssh] host: 172.20.0.10   login: admin   password: password123
+_CRED_RE = re.compile(r'login:\s*(\S+)\s+password:\s*(\S+)')
+_ATTEMPT_RE = re.compile(r'(\d+)\s+passwords?\s+tested')
+_SUDO_RE = re.compile(r'\(ALL\)\s+NOPASSWD:\s*(.+)')
+
+# Service names and privilege levels used by extract_numerical_features
+SSH_SERVICES = frozenset({"ssh"})
+HTTP_SERVICES = frozenset({"http", "https"})
+PRIVILEGE_LEVELS = {"none": 0.0, "user": 0.5, "root": 1.0}
+
+# Lines containing any of these keywords are kept by summarize_output
+_SUMMARY_RE = re.compile(r'open|found|success|password|root|admin|flag|error|failed', re.IGNORECASE)
+SUMMARY_MAX_LINES = 5
+_LINE_RE = re.compile(r'[^\n]+')
+
+_LOG = logging.getLogger(__name__)
+
 class OutputParser:
-    """Parse pentesting tool outputs into structured data"""
-    
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
+    """Parse pentesting tool outputs into structured data (stateless, call on the class)"""
     
-    def parse_nmap_output(self, output: str) -> Dict:
+    @staticmethod
+    def parse_nmap_output(output: str) -> Dict:
         """
         Parse nmap output to extract ports and services
         
@@ -34,39 +58,36 @@ class OutputParser:
             "total_ports_scanned": 0
         }
         
-        # Extract open ports
-        # Pattern: 22/tcp   open  ssh     OpenSSH 7.6p1
-        port_pattern = r'(\d+)/(tcp|udp)\s+open\s+(\S+)\s*(.*)?'
-        
-        for match in re.finditer(port_pattern, output):
-            port = int(match.group(1))
-            protocol = match.group(2)
-            service = match.group(3)
-            version = match.group(4).strip() if match.group(4) else ""
-            
-            parsed["open_ports"].append(port)
-            parsed["services"][port] = {
-                "protocol": protocol,
-                "service": service,
-                "version": version
-            }
+        # Extract open ports (plain substring pre-check skips the regex on filtered hosts)
+        if "open" in output:
+            for match in _PORT_RE.finditer(output):
+                port = int(match.group(1))
+                protocol = match.group(2)
+                service = match.group(3)
+                version = match.group(4).strip() if match.group(4) else ""
+                
+                parsed["open_ports"].append(port)
+                parsed["services"][port] = {
+                    "protocol": protocol,
+                    "service": service,
+                    "version": version
+                }
         
         # Extract OS information
-        os_pattern = r'OS details:\s*(.+)'
-        os_match = re.search(os_pattern, output)
+        os_match = _OS_RE.search(output)
         if os_match:
             parsed["os_guess"] = os_match.group(1).strip()
         
         # Count scanned ports
-        scanned_pattern = r'Nmap scan report for.*?(\d+)\s+ports?\s+scanned'
-        scanned_match = re.search(scanned_pattern, output, re.DOTALL)
+        scanned_match = _SCAN_RE.search(output)
         if scanned_match:
             parsed["total_ports_scanned"] = int(scanned_match.group(1))
         
-        self.logger.info(f"Parsed nmap: {len(parsed['open_ports'])} open ports found")
+        _LOG.info("Parsed nmap: %d open ports found", len(parsed["open_ports"]))
         return parsed
     
-    def parse_hydra_output(self, output: str) -> Dict:
+    @staticmethod
+    def parse_hydra_output(output: str) -> Dict:
         """
         Parse Hydra output to extract credentials
         
@@ -82,10 +103,7 @@ class OutputParser:
             "success": False
         }
         
-        # Pattern: [22][ssh] host: 172.20.0.10   login: admin   password: password123
-        cred_pattern = r'login:\s*(\S+)\s+password:\s*(\S+)'
-        
-        for match in re.finditer(cred_pattern, output):
+        for match in _CRED_RE.finditer(output):
             username = match.group(1)
             password = match.group(2)
             parsed["credentials_found"].append({
@@ -95,15 +113,15 @@ class OutputParser:
             parsed["success"] = True
         
         # Extract attempt count
-        attempt_pattern = r'(\d+)\s+passwords?\s+tested'
-        attempt_match = re.search(attempt_pattern, output)
+        attempt_match = _ATTEMPT_RE.search(output)
         if attempt_match:
             parsed["attempts"] = int(attempt_match.group(1))
         
-        self.logger.info(f"Parsed Hydra: {len(parsed['credentials_found'])} credentials found")
+        _LOG.info("Parsed Hydra: %d credentials found", len(parsed["credentials_found"]))
         return parsed
     
-    def parse_ssh_output(self, output: str, command: str) -> Dict:
+    @staticmethod
+    def parse_ssh_output(output: str, command: str) -> Dict:
         """
         Parse SSH command output
         
@@ -130,23 +148,42 @@ class OutputParser:
         if "NOPASSWD" in output:
             parsed["indicators"]["sudo_nopasswd"] = True
             # Extract sudo commands
-            sudo_pattern = r'\(ALL\)\s+NOPASSWD:\s*(.+)'
-            sudo_match = re.search(sudo_pattern, output)
+            sudo_match = _SUDO_RE.search(output)
             if sudo_match:
                 parsed["indicators"]["sudo_commands"] = sudo_match.group(1).strip()
         
         # Detect SUID binaries
         if command.startswith("find") and "-perm" in command:
-            suid_binaries = [line.strip() for line in output.split('\n') if line.strip()]
+            suid_binaries = [path for line in output.splitlines() if (path := line.strip())]
             parsed["indicators"]["suid_binaries"] = suid_binaries
         
         # Detect interesting files
-        if "flag" in output.lower() or "ctf{" in output.lower():
+        lowered = output.lower()
+        if "flag" in lowered or "ctf{" in lowered:
             parsed["indicators"]["flag_found"] = True
         
         return parsed
     
-    def extract_numerical_features(self, parsed_data: Dict) -> List[float]:
+    @staticmethod
+    def scan_indicators(output: str) -> Dict:
+        """
+        Scan any tool output once for the markers the environment rewards
+        
+        Args:
+            output: Raw tool output
+            
+        Returns:
+            Dictionary of boolean indicators
+        """
+        lowered = output.lower()  # Single lowercase copy for all checks
+        return {
+            "flag_present": "flag" in lowered,
+            "ctf_flag": "ctf{" in lowered,
+            "nopasswd": "NOPASSWD" in output
+        }
+    
+    @staticmethod
+    def extract_numerical_features(parsed_data: Dict) -> np.ndarray:
         """
         Convert parsed data into numerical features for RL agent
         
@@ -154,35 +191,39 @@ class OutputParser:
             parsed_data: Parsed tool output
             
         Returns:
-            List of numerical features
+            float32 array of numerical features
         """
-        features = []
+        features = np.empty(5, dtype=np.float32)
         
         # Feature 1: Number of open ports (normalized)
         open_ports = len(parsed_data.get("open_ports", []))
-        features.append(min(open_ports / 10.0, 1.0))
-        
-        # Feature 2: SSH service available
-        services = parsed_data.get("services", {})
-        ssh_available = any(s.get("service") == "ssh" for s in services.values())
-        features.append(1.0 if ssh_available else 0.0)
-        
-        # Feature 3: HTTP service available
-        http_available = any(s.get("service") in ["http", "https"] for s in services.values())
-        features.append(1.0 if http_available else 0.0)
+        features[0] = min(open_ports / 10.0, 1.0)
+        
+        # Features 2-3: SSH / HTTP service available (one pass, stops once both are seen)
+        ssh_available = http_available = False
+        for svc in parsed_data.get("services", {}).values():
+            name = svc.get("service")
+            if name in SSH_SERVICES:
+                ssh_available = True
+            elif name in HTTP_SERVICES:
+                http_available = True
+            if ssh_available and http_available:
+                break
+        features[1] = 1.0 if ssh_available else 0.0
+        features[2] = 1.0 if http_available else 0.0
         
         # Feature 4: Credentials found
         creds_found = len(parsed_data.get("credentials_found", []))
-        features.append(1.0 if creds_found > 0 else 0.0)
+        features[3] = 1.0 if creds_found > 0 else 0.0
         
         # Feature 5: Privilege level (0=none, 0.5=user, 1.0=root)
         privilege = parsed_data.get("indicators", {}).get("privilege", "none")
-        priv_map = {"none": 0.0, "user": 0.5, "root": 1.0}
-        features.append(priv_map.get(privilege, 0.0))
+        features[4] = PRIVILEGE_LEVELS.get(privilege, 0.0)
         
         return features
     
-    def summarize_output(self, output: str, max_length: int = 200) -> str:
+    @staticmethod
+    def summarize_output(output: str, max_length: int = 200) -> str:
         """
         Create a concise summary of tool output
         
@@ -196,17 +237,13 @@ class OutputParser:
         if len(output) <= max_length:
             return output
         
-        # Extract key lines
-        lines = output.split('\n')
-        important_lines = []
-        
-        keywords = ["open", "found", "success", "password", "root", "admin", "flag", "error", "failed"]
-        
-        for line in lines:
-            if any(keyword in line.lower() for keyword in keywords):
-                important_lines.append(line.strip())
+        # Extract key lines (top 5 important lines), walking the output lazily
+        # so scanning stops once they are found and no full line list is built
+        lines = (m.group(0) for m in _LINE_RE.finditer(output))
+        important_lines = [line.strip() for line in
+                           itertools.islice(filter(_SUMMARY_RE.search, lines), SUMMARY_MAX_LINES)]
         
-        summary = '\n'.join(important_lines[:5])  # Top 5 important lines
+        summary = '\n'.join(important_lines)
         
         if len(summary) > max_length:
             summary = summary[:max_length] + "..."
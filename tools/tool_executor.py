@@ -8,16 +8,133 @@ Supports:
 - Standard Linux commands
 """
 
+import os
 import subprocess
 import shlex
+import socket
+import tempfile
+import functools
 import time
 import re
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 
 from safety.monitor import get_safety_monitor
 
+try:
+    import pwd
+    PWD_AVAILABLE = True
+except ImportError:
+    PWD_AVAILABLE = False
+
+# TCP scan techniques; nmap accepts only one of these per invocation
+_NMAP_TCP_SCANS = frozenset(("-sS", "-sT", "-sA", "-sW", "-sM", "-sN", "-sF", "-sX"))
+
+# Valueless flags that change which ports / protocols get scanned (-F: top 100 ports,
+# -sn: no port scan, -sU/-sO/-sY/-sZ: UDP / IP protocol / SCTP, -sL: list only)
+_NMAP_SCOPE_FLAGS = frozenset(("-F", "-sn", "-sL", "-sU", "-sO", "-sY", "-sZ"))
+
+# nmap options whose value is the next token (names without leading dashes;
+# nmap accepts long options with one or two dashes)
+_NMAP_VALUE_OPTIONS = frozenset((
+    "p", "e", "S", "D", "g", "b", "sI", "oN", "oX", "oS", "oG", "oA",
+    "script", "script-args", "script-args-file", "script-timeout",
+    "max-retries", "min-rate", "max-rate", "host-timeout", "scan-delay", "max-scan-delay",
+    "min-hostgroup", "max-hostgroup", "min-parallelism", "max-parallelism",
+    "min-rtt-timeout", "max-rtt-timeout", "initial-rtt-timeout",
+    "top-ports", "port-ratio", "exclude-ports", "version-intensity",
+    "data", "data-string", "data-length", "ttl", "mtu", "source-port",
+    "spoof-mac", "dns-servers", "proxies", "exclude", "excludefile",
+    "datadir", "stylesheet", "stats-every",
+))
+# Options that make nmap pick its targets somewhere other than the command line
+_NMAP_TARGET_OPTIONS = frozenset(("iL", "iR", "resume"))
+
+def _group_nmap_args(tokens) -> Tuple[List[Tuple[str, ...]], List[str]]:
+    """
+    Group nmap flag tokens into options, each with its value if it takes one
+    
+    Args:
+        tokens: Tokenized nmap flags
+        
+    Returns:
+        (option groups, positional tokens); positionals are what nmap would scan as targets
+    """
+    groups, positionals = [], []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if not token.startswith("-") or token == "-":
+            positionals.append(token)
+        elif token.lstrip("-") in _NMAP_VALUE_OPTIONS and i + 1 < len(tokens):
+            groups.append((token, tokens[i + 1]))
+            i += 1
+        else:
+            groups.append((token,))
+        i += 1
+    return groups, positionals
+
+# Canned responses for simulated SSH commands, checked in this order; {user} is the SSH username
+_SIMULATED_SSH_OUTPUTS = {
+    "whoami": "{user}",
+    "id": "uid=1000({user}) gid=1000({user}) groups=1000({user})",
+    "uname -a": "Linux vulnerable 5.4.0-42-generic #46-Ubuntu SMP x86_64 GNU/Linux",
+    "sudo -l": "User {user} may run the following commands:\n    (ALL) NOPASSWD: /usr/bin/vim",
+    "cat /etc/passwd": "root:x:0:0:root:/root:/bin/bash\nadmin:x:1000:1000::/home/admin:/bin/bash",
+    "ps aux": "USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND\nroot         1  0.0  0.1  12345  6789 ?        Ss   10:00   0:01 /sbin/init",
+}
+# Bound on remembered command -> canned response matches
+SSH_MATCH_CACHE_SIZE = 1024
+
+# Bound on remembered nmap results (oldest evicted first) and default freshness
+NMAP_CACHE_SIZE = 256
+NMAP_CACHE_TTL_SECONDS = 300
+
+# Small built-in wordlist used by execute_hydra when none is given
+COMMON_PASSWORDS = (
+    "password", "password123", "admin", "123456",
+    "root", "toor", "test", "guest", "user"
+)
+
+@functools.lru_cache(maxsize=256)
+def _split_args(args: str) -> Tuple[str, ...]:
+    """shlex-split a flag/command string; the agent reuses a handful, so each is tokenized once"""
+    return tuple(shlex.split(args))
+
+@functools.lru_cache(maxsize=None)
+def _default_wordlist() -> str:
+    """Write the built-in wordlist once per process and return its path"""
+    wordlist_path = Path(tempfile.gettempdir()) / "pentest_wordlist.txt"
+    wordlist_path.write_text("\n".join(COMMON_PASSWORDS))
+    return str(wordlist_path)
+
+def _inprocess_whoami(args: Tuple[str, ...]) -> Optional[str]:
+    """whoami: effective user name, as coreutils prints it"""
+    if len(args) > 1 or not PWD_AVAILABLE:
+        return None
+    return pwd.getpwuid(os.geteuid()).pw_name + "\n"
+
+def _inprocess_pwd(args: Tuple[str, ...]) -> Optional[str]:
+    """pwd: physical working directory (coreutils /bin/pwd defaults to -P)"""
+    if len(args) > 1:
+        return None
+    return os.getcwd() + "\n"
+
+def _inprocess_echo(args: Tuple[str, ...]) -> Optional[str]:
+    """echo without options: arguments joined by single spaces"""
+    if any(arg.startswith("-") for arg in args[1:]):
+        return None
+    return " ".join(args[1:]) + "\n"
+
+# Generic commands answered without spawning a process; a handler returns
+# None for argument forms it doesn't reproduce, which then run for real
+_INPROCESS_COMMANDS = {
+    "whoami": _inprocess_whoami,
+    "pwd": _inprocess_pwd,
+    "echo": _inprocess_echo,
+}
+
 class ToolExecutor:
     """Executes pentesting tools with safety controls and timeout"""
     
@@ -38,6 +155,13 @@ class ToolExecutor:
         
         self.timeout = self.safety.config.get("command_timeout_seconds", 30)
         
+        # command -> matching _SIMULATED_SSH_OUTPUTS key (None for the default response)
+        self._ssh_matches: Dict[str, Optional[str]] = {}
+        
+        # nmap argv -> (monotonic time, output) of the last successful run
+        self._nmap_cache: Dict[Tuple[str, ...], Tuple[float, str]] = {}
+        self.nmap_cache_ttl = self.safety.config.get("nmap_cache_ttl_seconds", NMAP_CACHE_TTL_SECONDS)
+        
     def execute_nmap(self, scan_type: str = "-sV") -> Tuple[bool, str]:
         """
         Execute nmap scan
@@ -54,7 +178,17 @@ class ToolExecutor:
         if not self.safety.check_rate_limit():
             return False, "Rate limit exceeded"
         
-        # Build nmap command
+        # The whitelisted target must be the only thing nmap scans
+        flags = _split_args(scan_type)
+        groups, positionals = _group_nmap_args(flags)
+        target_options = [group[0] for group in groups
+                          if group[0].lstrip("-").split("=", 1)[0] in _NMAP_TARGET_OPTIONS]
+        if positionals or target_options:
+            self.logger.error(f"✗ BLOCKED nmap flags naming extra targets: {positionals + target_options}")
+            return False, "Scan flags may not name additional targets"
+        
+        # Build nmap command (argv directly; the string form is for sanitizing and logging)
+        argv = ["nmap", *flags, "-Pn", "--host-timeout", "10s", self.target_ip]
         command = f"nmap {scan_type} -Pn --host-timeout 10s {self.target_ip}"
         
         # Sanitize
@@ -62,11 +196,18 @@ class ToolExecutor:
         if command is None:
             return False, "Command blocked by safety controls"
         
+        # A policy looping on the same scan gets the recent result instead of a new nmap run
+        key = tuple(argv)
+        cached = self._nmap_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.nmap_cache_ttl:
+            self.safety.record_action(f"nmap {scan_type} (cached)", self.target_ip, True)
+            return True, cached[1]
+        
         self.logger.info(f"Executing: {command}")
         
         try:
             result = subprocess.run(
-                shlex.split(command),
+                argv,
                 capture_output=True,
                 text=True,
                 timeout=self.timeout
@@ -75,6 +216,13 @@ class ToolExecutor:
             success = result.returncode == 0
             output = result.stdout if success else result.stderr
             
+            if success:
+                cache = self._nmap_cache
+                cache.pop(key, None)
+                if len(cache) >= NMAP_CACHE_SIZE:
+                    del cache[next(iter(cache))]
+                cache[key] = (time.monotonic(), output)
+            
             self.safety.record_action(f"nmap {scan_type}", self.target_ip, success)
             return success, output
             
@@ -87,6 +235,72 @@ class ToolExecutor:
             self.safety.record_action(f"nmap {scan_type}", self.target_ip, False)
             return False, str(e)
     
+    def execute_nmap_batch(self, scan_profiles: List[str]) -> List[Tuple[bool, str]]:
+        """
+        Execute several nmap scan profiles with as few nmap runs as possible
+        
+        Profiles are merged into one invocation (options deduplicated, -p port
+        lists unioned) so process startup and host discovery are paid once.
+        Profiles that can't share a run (different TCP scan techniques, nmap's
+        default ports mixed with an explicit port list, different scope flags
+        such as -F or -sn, or different valued options such as --script or
+        --max-retries) get their own.
+        
+        Args:
+            scan_profiles: Nmap scan flag strings (e.g., ["-sV", "-O", "-sV -p 22,80"])
+            
+        Returns:
+            One (success, output) tuple per profile, from the run it was merged into
+        """
+        # (tcp scan, default ports?, fixed options) -> (options, ports), dicts as ordered sets;
+        # fixed options (scope flags and valued options) must match exactly to share a run
+        groups = {}
+        keys = []
+        for profile in scan_profiles:
+            options, ports = self._split_nmap_profile(profile)
+            tcp_scan = next((opt[0] for opt in options if opt[0] in _NMAP_TCP_SCANS), None)
+            fixed = tuple(sorted(opt for opt in options if len(opt) > 1 or opt[0] in _NMAP_SCOPE_FLAGS))
+            key = (tcp_scan, ports is None, fixed)
+            merged_options, merged_ports = groups.setdefault(key, ({}, {}))
+            merged_options.update(dict.fromkeys(options))
+            if ports is not None:
+                merged_ports.update(dict.fromkeys(ports.split(",")))
+            keys.append(key)
+        
+        # A full port scan (-p-) already covers nmap's default ports
+        for (tcp_scan, default_ports, fixed), (options, ports) in list(groups.items()):
+            full_key = (tcp_scan, False, fixed)
+            if default_ports and full_key in groups and "-" in groups[full_key][1]:
+                groups[full_key][0].update(options)
+                del groups[(tcp_scan, True, fixed)]
+                keys = [full_key if k == (tcp_scan, True, fixed) else k for k in keys]
+        
+        results = {}
+        for key, (options, ports) in groups.items():
+            args = [token for option in options for token in option]
+            if ports:
+                args.append("-p-" if "-" in ports else "-p" + ",".join(ports))
+            # shlex.join keeps quoted values intact through execute_nmap's split
+            results[key] = self.execute_nmap(shlex.join(args))
+        
+        return [results[key] for key in keys]
+    
+    @staticmethod
+    def _split_nmap_profile(profile: str) -> Tuple[List[Tuple[str, ...]], Optional[str]]:
+        """Split an nmap flag string into (option groups, port spec); the port spec is None for nmap's default ports"""
+        options, ports = [], None
+        groups, positionals = _group_nmap_args(_split_args(profile))
+        for group in groups:
+            if group[0] == "-p" and len(group) == 2:
+                ports = group[1]
+            elif group[0].startswith("-p") and len(group[0]) > 2 and len(group) == 1:  # -p- / -p22,80
+                ports = group[0][2:]
+            else:
+                options.append(group)
+        # Left in place so execute_nmap refuses them as extra targets
+        options.extend((token,) for token in positionals)
+        return options, ports
+    
     def execute_hydra(self, port: int = 22, username: str = "admin", 
                      wordlist: str = None) -> Tuple[bool, str]:
         """
@@ -111,16 +325,11 @@ class ToolExecutor:
         
         # Use small built-in wordlist for safety
         if wordlist is None:
-            # Create temporary wordlist with common passwords
-            wordlist_path = Path("/tmp/pentest_wordlist.txt")
-            common_passwords = [
-                "password", "password123", "admin", "123456", 
-                "root", "toor", "test", "guest", "user"
-            ]
-            wordlist_path.write_text("\n".join(common_passwords))
-            wordlist = str(wordlist_path)
+            wordlist = _default_wordlist()
         
         # Build hydra command with rate limiting
+        argv = ["hydra", "-l", username, "-P", wordlist, "-t", "4", "-w", "10",
+                f"ssh://{self.target_ip}:{port}"]
         command = f"hydra -l {username} -P {wordlist} -t 4 -w 10 ssh://{self.target_ip}:{port}"
         
         # Sanitize
@@ -131,17 +340,20 @@ class ToolExecutor:
         self.logger.info(f"Executing: {command}")
         
         try:
+            # Hydra reports to both streams; read them interleaved from one pipe
             result = subprocess.run(
-                shlex.split(command),
-                capture_output=True,
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
                 timeout=self.timeout
             )
             
-            output = result.stdout + result.stderr
+            output = result.stdout
             
             # Check if password found
-            success = "password:" in output.lower() or "valid password found" in output.lower()
+            output_lc = output.lower()
+            success = "password:" in output_lc or "valid password found" in output_lc
             
             self.safety.record_action(f"hydra SSH", self.target_ip, success)
             return success, output
@@ -190,23 +402,20 @@ class ToolExecutor:
         # For safety, we'll simulate SSH commands rather than actually executing them
         # In production, you'd use paramiko or sshpass here
         
-        simulated_outputs = {
-            "whoami": username,
-            "id": f"uid=1000({username}) gid=1000({username}) groups=1000({username})",
-            "uname -a": "Linux vulnerable 5.4.0-42-generic #46-Ubuntu SMP x86_64 GNU/Linux",
-            "sudo -l": f"User {username} may run the following commands:\n    (ALL) NOPASSWD: /usr/bin/vim",
-            "cat /etc/passwd": "root:x:0:0:root:/root:/bin/bash\nadmin:x:1000:1000::/home/admin:/bin/bash",
-            "ps aux": "USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND\nroot         1  0.0  0.1  12345  6789 ?        Ss   10:00   0:01 /sbin/init",
-        }
-        
-        # Simple command matching
-        for cmd_pattern, output in simulated_outputs.items():
-            if cmd_pattern in command:
-                self.safety.record_action(f"SSH: {command}", self.target_ip, True)
-                return True, output
+        # Simple command matching; the agent repeats a small set of commands,
+        # so the pattern scan runs once per distinct command
+        try:
+            cmd_pattern = self._ssh_matches[command]
+        except KeyError:
+            cmd_pattern = next((p for p in _SIMULATED_SSH_OUTPUTS if p in command), None)
+            if len(self._ssh_matches) < SSH_MATCH_CACHE_SIZE:
+                self._ssh_matches[command] = cmd_pattern
         
-        # Default response
         self.safety.record_action(f"SSH: {command}", self.target_ip, True)
+        if cmd_pattern is not None:
+            return True, _SIMULATED_SSH_OUTPUTS[cmd_pattern].format(user=username)
+        
+        # Default response
         return True, f"[SIMULATED] Command executed: {command}"
     
     def execute_generic_command(self, command: str) -> Tuple[bool, str]:
@@ -241,8 +450,15 @@ class ToolExecutor:
         self.logger.info(f"Executing generic: {command}")
         
         try:
+            args = _split_args(command)
+            handler = _INPROCESS_COMMANDS.get(args[0])
+            output = handler(args) if handler is not None else None
+            if output is not None:
+                self.safety.record_action(command, "localhost", True)
+                return True, output
+            
             result = subprocess.run(
-                shlex.split(command),
+                args,
                 capture_output=True,
                 text=True,
                 timeout=5  # Short timeout for generic commands
@@ -259,19 +475,20 @@ class ToolExecutor:
             self.safety.record_action(command, "localhost", False)
             return False, str(e)
     
-    def check_connectivity(self) -> bool:
+    def check_connectivity(self, port: int = 22) -> bool:
         """
         Check if target is reachable
         
+        Args:
+            port: TCP port to probe (a refused connection still means the host is up)
+            
         Returns:
-            True if target responds to ping
+            True if target answers a TCP connect
         """
         try:
-            result = subprocess.run(
-                ["ping", "-c", "1", "-W", "2", self.target_ip],
-                capture_output=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except:
+            with socket.create_connection((self.target_ip, port), timeout=2):
+                return True
+        except ConnectionRefusedError:
+            return True
+        except OSError:
             return False
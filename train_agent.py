@@ -10,6 +10,11 @@ from env.advanced_env import AdvancedKillChainEnv
 import torch
 import numpy as np
 
+# Environment steps collected per PPO update, split across the parallel envs
+ROLLOUT_STEPS = 128
+# Shortest per-env rollout segment; caps the env count at ROLLOUT_STEPS // MIN_ENV_STEPS
+MIN_ENV_STEPS = 16
+
 def train_smart_agent():
     print("Initializing Super-Smart Red Team Agent (2025 Edition)...")
     
@@ -26,8 +31,15 @@ def train_smart_agent():
     os.makedirs(log_dir, exist_ok=True)
     
     # Initialize Environment
-    # We use DummyVecEnv for simple sequential execution, or SubprocVecEnv for parallel
-    env = DummyVecEnv([lambda: AdvancedKillChainEnv()])
+    # SubprocVecEnv steps one env per worker process in parallel; each env
+    # collects an equal share, so every update still sees exactly ROLLOUT_STEPS
+    # transitions (n_envs is capped, then rounded down to a divisor of ROLLOUT_STEPS)
+    n_envs = min(max(4, (os.cpu_count() or 1) // 2), ROLLOUT_STEPS // MIN_ENV_STEPS)
+    while ROLLOUT_STEPS % n_envs:
+        n_envs -= 1
+    n_steps = ROLLOUT_STEPS // n_envs
+    env = SubprocVecEnv([lambda: AdvancedKillChainEnv() for _ in range(n_envs)])
+    print(f"Parallel Environments: {n_envs} x {n_steps} steps per rollout")
     
     # Initialize Recurrent PPO Agent
     # MultiInputLstmPolicy: Handles Dict observation spaces with LSTM
@@ -36,7 +48,7 @@ def train_smart_agent():
         env,
         verbose=1,
         learning_rate=0.0003,
-        n_steps=128,
+        n_steps=n_steps,
         batch_size=64,
         n_epochs=10,
         gamma=0.99,
@@ -78,9 +90,12 @@ def train_smart_agent():
     # Save Final Model
     model.save("redteam_lstm_final")
     print("Model saved to redteam_lstm_final.zip")
+    env.close()
 
     # --- EVALUATION ---
     print("\nRunning Evaluation Episode...")
+    # A single in-process env is enough to watch one episode
+    env = DummyVecEnv([lambda: AdvancedKillChainEnv()])
     obs = env.reset()
     # LSTM states
     lstm_states = None
@@ -11,12 +11,17 @@ from env.linux_env import LinuxSecEnv
 from agent.dqn_brain import RedTeamAgent
 from utils.report_generator import ReportGenerator
 
+# Run a replay (learning) step every TRAIN_FREQ environment steps
+TRAIN_FREQ = 4
+
 def train_red_team(episodes=500, resume_from=None):
     print("🚩 Initializing Red Team Linux Operation...")
     print("=" * 60)
     
     env = LinuxSecEnv()
     agent = RedTeamAgent(state_dim=5, action_dim=20)
+    # Epsilon decays per replay; keep the same schedule per environment step
+    agent.epsilon_decay **= TRAIN_FREQ
     
     # Create checkpoints directory
     checkpoint_dir = "checkpoints"
@@ -38,6 +43,8 @@ def train_red_team(episodes=500, resume_from=None):
     print("=" * 60)
     
     best_reward = -float('inf')
+    total_steps = 0
+    reporter = ReportGenerator()
     
     for e in range(start_episode, episodes):
         state, _ = env.reset()
@@ -45,31 +52,34 @@ def train_red_team(episodes=500, resume_from=None):
         done = False
         step_count = 0
         
-        # Initialize Report for this "Engagement"
-        reporter = ReportGenerator(target_name=f"Sim_Server_{e}")
+        # Start a fresh Report for this "Engagement"
+        reporter.reset(target_name=f"Sim_Server_{e}")
         
         while not done:
             action = agent.act(state)
             next_state, reward, terminated, truncated, info = env.step(action)
             done = terminated or truncated
             step_count += 1
+            total_steps += 1
             
             # Log Action
             reporter.log_action(info['action'], info['output'])
             
-            # Log Findings
-            if "SUCCESS" in info['output']:
+            # Log Findings (classified by the env, no output scanning here)
+            findings = info['findings']
+            if "weak_credentials" in findings:
                 reporter.add_finding("Weak Credentials", "HIGH", f"Found password via brute force: {info['output']}")
-            if "Connection received" in info['output']:
+            if "rce" in findings:
                 reporter.add_finding("Remote Code Execution", "CRITICAL", "Reverse shell established.")
-            if "root" in info['output'] and "whoami" in info['action']:
+            if "privesc" in findings:
                 reporter.add_finding("Privilege Escalation", "CRITICAL", "Root access achieved.")
             
             agent.remember(state, action, reward, next_state, done)
             state = next_state
             total_reward += reward
             
-            agent.replay()
+            if total_steps % TRAIN_FREQ == 0:
+                agent.replay()
             
         # Generate Report if we won
         if total_reward > 100:
@@ -81,12 +91,12 @@ def train_red_team(episodes=500, resume_from=None):
         if total_reward > best_reward:
             best_reward = total_reward
             best_path = os.path.join(checkpoint_dir, "redteam_best.pth")
-            agent.save(best_path)
+            agent.save_async(best_path)
             
         # Save checkpoint every 50 episodes
         if (e + 1) % 50 == 0:
             checkpoint_path = os.path.join(checkpoint_dir, f"redteam_ep{e+1}.pth")
-            agent.save(checkpoint_path)
+            agent.save_async(checkpoint_path)
             
         # Progress reporting
         if (e + 1) % 10 == 0:
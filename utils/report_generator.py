@@ -1,6 +1,17 @@
 
 import datetime
 import os
+import time
+
+_REPORTS_DIR = "reports"
+_reports_dir_ready = False
+
+def _ensure_reports_dir():
+    """Create the reports directory on first use; later reports skip the stat"""
+    global _reports_dir_ready
+    if not _reports_dir_ready:
+        os.makedirs(_REPORTS_DIR, exist_ok=True)
+        _reports_dir_ready = True
 
 class ReportGenerator:
     """
@@ -12,14 +23,22 @@ class ReportGenerator:
         self.vulns_found = []
         self.actions_taken = []
         self.start_time = datetime.datetime.now()
+        self._t0 = time.monotonic()
+        
+    def reset(self, target_name=None):
+        """
+        Clears logged actions and findings so the generator can be reused for a new engagement.
+        """
+        if target_name is not None:
+            self.target_name = target_name
+        self.vulns_found.clear()
+        self.actions_taken.clear()
+        self.start_time = datetime.datetime.now()
+        self._t0 = time.monotonic()
         
     def log_action(self, action, output):
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.actions_taken.append({
-            "time": timestamp,
-            "action": action,
-            "output": output
-        })
+        # Store the offset from start_time; wall-clock formatting happens in generate_report
+        self.actions_taken.append((time.monotonic() - self._t0, action, output))
         
     def add_finding(self, finding_type, severity, description):
         self.vulns_found.append({
@@ -30,43 +49,55 @@ class ReportGenerator:
         
     def generate_report(self):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
-        filename = f"reports/Pentest_Report_{self.target_name}_{timestamp}.md"
+        filename = f"{_REPORTS_DIR}/Pentest_Report_{self.target_name}_{timestamp}.md"
+        
+        _ensure_reports_dir()
+        
+        # Build the whole report in memory and write it in one call
+        parts = []
+        
+        # Header
+        parts.append(f"# Penetration Test Report: {self.target_name}\n")
+        parts.append(f"**Date:** {datetime.datetime.now().strftime('%Y-%m-%d')}\n")
+        parts.append("**Agent:** RedTeam-Linux-v2\n")
+        parts.append("---\n\n")
+        
+        # Executive Summary
+        parts.append("## 1. Executive Summary\n")
+        if any(v['severity'] == "CRITICAL" for v in self.vulns_found):
+            parts.append("**Status: COMPROMISED**\n")
+            parts.append("The target system was successfully compromised. Root access was achieved.\n")
+        else:
+            parts.append("**Status: SECURE**\n")
+            parts.append("No critical vulnerabilities were exploited during this session.\n")
+        parts.append("\n")
+        
+        # Findings
+        parts.append("## 2. Vulnerabilities Identified\n")
+        if not self.vulns_found:
+            parts.append("*No vulnerabilities found.*\n")
+        else:
+            parts.extend(f"### {v['type']} ({v['severity']})\n{v['description']}\n\n"
+                         for v in self.vulns_found)
+        
+        # Attack Log
+        parts.append("## 3. Attack Log (Timeline)\n")
+        parts.append("| Time | Action | Output |\n")
+        parts.append("|---|---|---|\n")
+        start = self.start_time
+        for offset, action, output in self.actions_taken:
+            stamp = (start + datetime.timedelta(seconds=offset)).strftime("%H:%M:%S")
+            # Truncate output for readability
+            clean_output = output.replace("\n", " ").strip()[:50] + "..."
+            parts.append(f"| {stamp} | `{action}` | {clean_output} |\n")
         
-        os.makedirs("reports", exist_ok=True)
+        # Encode once and hand the bytes straight to the OS, no buffered text layer
+        data = memoryview("".join(parts).encode("utf-8"))
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         
-        with open(filename, "w", encoding="utf-8") as f:
-            # Header
-            f.write(f"# Penetration Test Report: {self.target_name}\n")
-            f.write(f"**Date:** {datetime.datetime.now().strftime('%Y-%m-%d')}\n")
-            f.write(f"**Agent:** RedTeam-Linux-v2\n")
-            f.write("---\n\n")
-            
-            # Executive Summary
-            f.write("## 1. Executive Summary\n")
-            if any(v['severity'] == "CRITICAL" for v in self.vulns_found):
-                f.write("**Status: COMPROMISED**\n")
-                f.write("The target system was successfully compromised. Root access was achieved.\n")
-            else:
-                f.write("**Status: SECURE**\n")
-                f.write("No critical vulnerabilities were exploited during this session.\n")
-            f.write("\n")
-            
-            # Findings
-            f.write("## 2. Vulnerabilities Identified\n")
-            if not self.vulns_found:
-                f.write("*No vulnerabilities found.*\n")
-            else:
-                for v in self.vulns_found:
-                    f.write(f"### {v['type']} ({v['severity']})\n")
-                    f.write(f"{v['description']}\n\n")
-            
-            # Attack Log
-            f.write("## 3. Attack Log (Timeline)\n")
-            f.write("| Time | Action | Output |\n")
-            f.write("|---|---|---|\n")
-            for log in self.actions_taken:
-                # Truncate output for readability
-                clean_output = log['output'].replace("\n", " ").strip()[:50] + "..."
-                f.write(f"| {log['time']} | `{log['action']}` | {clean_output} |\n")
-                
         return filename